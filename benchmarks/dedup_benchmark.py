@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Benchmark profile deduplication: blocked matching vs. the original pairwise scan.
+
+Usage:
+    python benchmarks/dedup_benchmark.py [--profiles 10000] [--reference-max 3000] [--seed 7]
+
+Generates a synthetic result set with spacing/case variants, initials and
+repeated companies/titles and times dedup.remove_duplicates on it against the
+original O(n^2) algorithm (on the first --reference-max profiles, since the
+pairwise scan gets slow quickly). tests/test_dedup.py checks that both agree.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'tests'))
+
+from dedup import remove_duplicates
+# The generator and the pairwise reference live with the parity test
+from test_dedup import reference_remove_duplicates, synthetic_profiles
+
+def timed(fn, profiles):
+    start = time.perf_counter()
+    result = fn(profiles)
+    return result, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profiles', type=int, default=10000, help='profiles to deduplicate')
+    parser.add_argument('--reference-max', type=int, default=3000,
+                        help='profiles to run the pairwise reference on (0 to skip)')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    profiles = synthetic_profiles(args.profiles, args.seed)
+
+    result, seconds = timed(remove_duplicates, profiles)
+    print(f"blocked    {len(profiles):>7} profiles -> {len(result):>6} unique  {seconds * 1000:10.1f} ms")
+
+    if args.reference_max:
+        subset = profiles[:args.reference_max]
+        blocked, blocked_seconds = timed(remove_duplicates, subset)
+        reference, reference_seconds = timed(reference_remove_duplicates, subset)
+        print(f"blocked    {len(subset):>7} profiles -> {len(blocked):>6} unique  {blocked_seconds * 1000:10.1f} ms")
+        print(f"pairwise   {len(subset):>7} profiles -> {len(reference):>6} unique  {reference_seconds * 1000:10.1f} ms")
+
+        if [p.id for p in blocked] != [p.id for p in reference]:
+            print("❌ Blocked and pairwise results differ")
+            sys.exit(1)
+        print("✅ Blocked and pairwise results are identical")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark container lookups through the document ElementIndex vs. walking the
+parse tree with soupsieve and get_text() for every container.
+
+Usage:
+    python benchmarks/element_index_benchmark.py [path/to/saved_pages] [--depth 200] [--repeat 3]
+
+Every site-specific container selector is run, and every match is then given
+the team-member field lookups and a get_text(), first on the tree and then
+through the index. Both must return the same elements and text. Without a
+corpus directory a page of --depth nested team cards is used, which is the
+worst case for per-container tree walks.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from extractors.document import ParsedDocument
+
+CONTAINER_SELECTORS = [
+    '[class*="team"]', '[class*="member"]', '[class*="profile"]', '[class*="card"]',
+    'article', 'section', '.team-member', '.member', '.profile', '.card'
+]
+FIELD_SELECTORS = [
+    'h3', 'h4', '.name', '.member-name', '[class*="name"]', '.title', '.role', '[class*="title"]',
+    '.bio', '[class*="bio"]', 'img', '.image img', '.photo img', '.avatar img'
+]
+
+def nested_page(depth: int) -> str:
+    cards = ''.join(f'<div class="team-card"><h3 class="name">Person {i}</h3><p class="title">Role {i}</p>'
+                    for i in range(depth))
+    return f"<html><body>{cards}{'</div>' * depth}</body></html>"
+
+def load_pages(corpus_dir, depth: int):
+    if corpus_dir is None:
+        return [nested_page(depth)]
+    return [path.read_text(encoding='utf-8', errors='replace') for path in sorted(Path(corpus_dir).glob('*.html'))]
+
+def tree_lookups(document: ParsedDocument):
+    results = []
+    for selector in CONTAINER_SELECTORS:
+        for container in document.soup.select(selector):
+            fields = [container.select_one(field) for field in FIELD_SELECTORS]
+            results.append((container, fields, container.get_text()))
+    return results
+
+def index_lookups(document: ParsedDocument):
+    index = document.index
+    results = []
+    for selector in CONTAINER_SELECTORS:
+        for container in index.select(selector):
+            fields = [index.select_one(field, within=container) for field in FIELD_SELECTORS]
+            results.append((container, fields, index.text_of(container)))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('corpus', nargs='?', help='directory of saved *.html pages (default: nested synthetic page)')
+    parser.add_argument('--depth', type=int, default=200, help='nesting depth of the synthetic page')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), args.depth * 10))
+    documents = [ParsedDocument.from_html(html) for html in load_pages(args.corpus, args.depth)]
+
+    timings = {}
+    results = {}
+    for label, fn in (('tree walks', tree_lookups), ('index', index_lookups)):
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            results[label] = [fn(document) for document in documents]
+        timings[label] = (time.perf_counter() - start) / args.repeat
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for document in documents:
+            ParsedDocument(document.soup)
+    build_seconds = (time.perf_counter() - start) / args.repeat
+
+    containers = sum(len(result) for result in results['index'])
+    print(f"{len(documents)} pages, {containers} containers")
+    for label, seconds in timings.items():
+        print(f"{label:<12} {seconds * 1000:10.1f} ms")
+    print(f"{'index build':<12} {build_seconds * 1000:10.1f} ms")
+    print(f"speedup      {timings['tree walks'] / (timings['index'] + build_seconds):10.2f}x (including the build)")
+
+    def identities(pages):
+        return [[(id(c), [id(f) for f in fields], text) for c, fields, text in page] for page in pages]
+
+    if identities(results['tree walks']) != identities(results['index']):
+        print("❌ Index lookups returned different elements or text")
+        sys.exit(1)
+    print("✅ Index and tree-walk lookups are identical")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark parse + extraction time for each HTML parser backend.
+
+Usage:
+    python benchmarks/parser_backends.py path/to/saved_pages [--repeat 5]
+
+Every *.html file in the corpus directory is parsed with each installed
+backend and run through the site-specific and CSS extractors. The profile
+counts column shows whether the backends agree on the results.
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from extractors.document import PARSER_BACKENDS, ParsedDocument
+from extractors.css_extractor import CSSProfileExtractor
+from extractors.site_specific import SiteSpecificExtractor
+
+def load_corpus(corpus_dir: Path):
+    """Load saved pages as (url, html) pairs"""
+    pages = []
+    for path in sorted(corpus_dir.glob('*.html')):
+        # Saved pages don't carry their URL, so derive a stable one from the file name
+        url = f"https://example.com/{path.stem}"
+        pages.append((url, path.read_text(encoding='utf-8', errors='replace')))
+    return pages
+
+def run_backend(backend, pages, repeat: int):
+    """Return (parse seconds, extract seconds, profiles found) for one backend"""
+    css_extractor = CSSProfileExtractor()
+    site_extractor = SiteSpecificExtractor()
+    parse_time = 0.0
+    extract_time = 0.0
+    profiles_found = 0
+
+    for _ in range(repeat):
+        profiles_found = 0
+        for url, html in pages:
+            start = time.perf_counter()
+            document = ParsedDocument(backend.parse(html))
+            parse_time += time.perf_counter() - start
+
+            start = time.perf_counter()
+            profiles = asyncio.run(site_extractor.extract(document, url))
+            profiles += css_extractor.extract(document, url)
+            extract_time += time.perf_counter() - start
+            profiles_found += len(profiles)
+
+    return parse_time / repeat, extract_time / repeat, profiles_found
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HTML parser backends")
+    parser.add_argument('corpus', type=Path, help="Directory of saved *.html pages")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per backend (default: 3)")
+    args = parser.parse_args()
+
+    pages = load_corpus(args.corpus)
+    if not pages:
+        print(f"❌ No *.html files found in {args.corpus}")
+        sys.exit(1)
+
+    total_kb = sum(len(html) for _, html in pages) / 1024
+    print(f"📄 Corpus: {len(pages)} pages, {total_kb:.0f} KB, {args.repeat} runs per backend\n")
+    print(f"{'backend':<14}{'parse ms':>12}{'extract ms':>12}{'total ms':>12}{'profiles':>10}")
+
+    for name, backend_class in PARSER_BACKENDS.items():
+        backend = backend_class()
+        if not backend.is_available():
+            print(f"{name:<14}{'not installed':>12}")
+            continue
+        parse_s, extract_s, found = run_backend(backend, pages, args.repeat)
+        print(f"{name:<14}{parse_s * 1000:>12.1f}{extract_s * 1000:>12.1f}"
+              f"{(parse_s + extract_s) * 1000:>12.1f}{found:>10}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark CSSProfileExtractor field extraction: precompiled selector plan
+vs. the original select_one-per-selector implementation.
+
+Usage:
+    python benchmarks/selector_plan_benchmark.py [path/to/saved_pages] [--repeat 3] [--members 200]
+
+Every article/section/div in each page is treated as a profile container and
+run through both implementations; the extracted fields must be identical.
+Without a corpus directory a synthetic team page with --members cards is used.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from extractors.css_extractor import CSSProfileExtractor
+from extractors.document import ParsedDocument
+
+def synthetic_page(members: int) -> str:
+    cards = []
+    for i in range(members):
+        cards.append(f"""
+        <div class="team-member card">
+          <img class="avatar" src="/img/{i}.jpg" alt="profile photo">
+          <h2 class="member-name">Person {i} Example</h2>
+          <p class="job-title">Engineer {i}</p>
+          <p class="bio">Builds things at Example Corp and writes about distributed systems.</p>
+          <span class="location">City {i % 7}</span>
+          <a href="mailto:person{i}@example.com">Email</a>
+          <a href="https://linkedin.com/in/person{i}">LinkedIn</a>
+          <a href="https://github.com/person{i}">GitHub</a>
+          <a href="https://person{i}.example.com">Website</a>
+        </div>""")
+    return f"<html><body><section class='team'>{''.join(cards)}</section></body></html>"
+
+def load_pages(corpus_dir, members: int):
+    if corpus_dir is None:
+        return [synthetic_page(members)]
+    return [path.read_text(encoding='utf-8', errors='replace') for path in sorted(Path(corpus_dir).glob('*.html'))]
+
+def reference_fields(extractor: CSSProfileExtractor, container):
+    """Field extraction exactly as it was done before selector plans"""
+    def extract_text(selectors):
+        for selector in selectors:
+            element = container.select_one(selector)
+            if element:
+                text = element.get_text(strip=True)
+                if text and len(text) > 2:
+                    return text
+        return None
+
+    def extract_attribute(selectors, attr):
+        for selector in selectors:
+            element = container.select_one(selector)
+            if element:
+                value = element.get(attr)
+                if value:
+                    return value
+        return None
+
+    social = {}
+    for platform, patterns in extractor.social_patterns.items():
+        for pattern in patterns:
+            element = container.select_one(pattern)
+            if element and element.get('href'):
+                social[platform] = element.get('href')
+                break
+
+    return (
+        extract_text(extractor.selectors['name']),
+        extract_text(extractor.selectors['title']),
+        extract_attribute(extractor.selectors['email'], 'href'),
+        extract_attribute(extractor.selectors['phone'], 'href'),
+        extract_attribute(extractor.selectors['image'], 'src'),
+        extract_text(extractor.selectors['bio']),
+        extract_text(extractor.selectors['company']),
+        extract_text(extractor.selectors['location']),
+        social,
+    )
+
+def plan_fields(extractor: CSSProfileExtractor, container):
+    matches = extractor.plan.first_matches(container)
+    social = {}
+    for platform, patterns in extractor.social_patterns.items():
+        for pattern in patterns:
+            element = matches.get(pattern)
+            if element and element.get('href'):
+                social[platform] = element.get('href')
+                break
+
+    return (
+        extractor.extract_text(matches, extractor.selectors['name']),
+        extractor.extract_text(matches, extractor.selectors['title']),
+        extractor.extract_attribute(matches, extractor.selectors['email'], 'href'),
+        extractor.extract_attribute(matches, extractor.selectors['phone'], 'href'),
+        extractor.extract_attribute(matches, extractor.selectors['image'], 'src'),
+        extractor.extract_text(matches, extractor.selectors['bio']),
+        extractor.extract_text(matches, extractor.selectors['company']),
+        extractor.extract_text(matches, extractor.selectors['location']),
+        social,
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('corpus', nargs='?', help='directory of saved *.html pages (default: synthetic page)')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--members', type=int, default=200, help='cards on the synthetic page')
+    args = parser.parse_args()
+
+    extractor = CSSProfileExtractor()
+    containers = []
+    for html in load_pages(args.corpus, args.members):
+        soup = ParsedDocument.from_html(html).soup
+        containers.extend(soup.find_all(['article', 'section', 'div']))
+
+    timings = {}
+    results = {}
+    for label, fn in (('select_one', reference_fields), ('plan', plan_fields)):
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            results[label] = [fn(extractor, container) for container in containers]
+        timings[label] = (time.perf_counter() - start) / args.repeat
+
+    print(f"{len(containers)} containers, {len(extractor.plan.selectors)} selectors")
+    for label, seconds in timings.items():
+        print(f"{label:<12} {seconds * 1000:10.1f} ms")
+    print(f"speedup      {timings['select_one'] / timings['plan']:10.2f}x")
+
+    if results['select_one'] != results['plan']:
+        mismatches = sum(1 for a, b in zip(results['select_one'], results['plan']) if a != b)
+        print(f"❌ {mismatches} containers extracted differently")
+        sys.exit(1)
+    print("✅ Both implementations extracted identical fields")
+
+if __name__ == '__main__':
+    main()
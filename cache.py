@@ -0,0 +1,413 @@
+import hashlib
+import heapq
+import itertools
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+class LRUCache:
+    """In-memory cache with LRU eviction, entry/byte limits and heap-ordered TTL expiry"""
+
+    def __init__(self, max_entries: int = 1000, max_bytes: int = 64 * 1024 * 1024,
+                 sizeof: Optional[Callable[[Any], int]] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof or (lambda value: len(str(value)))
+
+        # key -> (value, expires_at, size, version); ordered least -> most recently used
+        self._entries: "OrderedDict[str, Tuple[Any, float, int, int]]" = OrderedDict()
+        # (expires_at, version, key); stale items are skipped when popped
+        self._expiry_heap: List[Tuple[float, int, str]] = []
+        self._versions = itertools.count()
+        self.total_bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        self.purge_expired()
+        return key in self._entries
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get a live value and mark it most recently used"""
+        self.purge_expired()
+        item = self._entries.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return item[0]
+
+    def set(self, key: str, value: Any, expires_at: float):
+        """Store a value until expires_at (epoch seconds), evicting LRU entries to stay in bounds"""
+        size = self.sizeof(value)
+        if key in self._entries:
+            self._remove(key)
+
+        # A value bigger than the whole budget would just evict everything else
+        if size > self.max_bytes:
+            return
+
+        version = next(self._versions)
+        self._entries[key] = (value, expires_at, size, version)
+        self.total_bytes += size
+        heapq.heappush(self._expiry_heap, (expires_at, version, key))
+
+        self.purge_expired()
+        while len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self.evictions += 1
+
+        self._compact_heap()
+
+    def delete(self, key: str):
+        """Remove a key if present"""
+        if key in self._entries:
+            self._remove(key)
+
+    def values(self) -> List[Any]:
+        """All live values, least recently used first"""
+        self.purge_expired()
+        return [item[0] for item in self._entries.values()]
+
+    def clear(self):
+        self._entries.clear()
+        self._expiry_heap.clear()
+        self.total_bytes = 0
+
+    def close(self):
+        pass
+
+    def purge_expired(self):
+        """Drop expired entries; only looks at the head of the expiry heap"""
+        now = time.time()
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            _, version, key = heapq.heappop(self._expiry_heap)
+            item = self._entries.get(key)
+            if item is not None and item[3] == version:
+                self._remove(key)
+                self.expirations += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        lookups = self.hits + self.misses
+        return {
+            "backend": "memory",
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+    def _remove(self, key: str):
+        value, expires_at, size, version = self._entries.pop(key)
+        self.total_bytes -= size
+
+    def _compact_heap(self):
+        # Overwrites and evictions leave stale heap items behind; rebuild once they dominate
+        if len(self._expiry_heap) > 2 * len(self._entries) + 64:
+            self._expiry_heap = [
+                (expires_at, version, key)
+                for key, (value, expires_at, size, version) in self._entries.items()
+            ]
+            heapq.heapify(self._expiry_heap)
+
+class SQLiteCache:
+    """Disk-backed cache shared by every worker process on the host, surviving restarts"""
+
+    # Don't rewrite accessed_at on every hit; LRU order only needs to be roughly right
+    TOUCH_INTERVAL_SECONDS = 60
+    # Running entry/byte counts only see this process's writes; re-read the totals this often
+    RECOUNT_INTERVAL_SECONDS = 60
+
+    def __init__(self, path: str, serialize: Callable[[Any], str], deserialize: Callable[[str], Any],
+                 max_entries: int = 10000, max_bytes: int = 256 * 1024 * 1024, busy_timeout: float = 0.25):
+        self.path = path
+        self.serialize = serialize
+        self.deserialize = deserialize
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        # Calls run on the event loop, so a write waits at most busy_timeout for another worker's
+        # write and is then skipped; WAL readers never wait for writers
+        self._conn = sqlite3.connect(path, timeout=busy_timeout, check_same_thread=False, isolation_level=None)
+        # WAL lets readers in other workers proceed while one worker writes
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA mmap_size=67108864")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, "
+            "size INTEGER NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_expires_at ON cache (expires_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed_at ON cache (accessed_at)")
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.write_conflicts = 0
+
+        with self._lock:
+            self._recount_locked(time.time())
+
+    def __len__(self) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) FROM cache WHERE expires_at > ?", (time.time(),)
+            ).fetchone()
+        return row[0]
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM cache WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return row is not None
+
+    @property
+    def total_bytes(self) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM cache WHERE expires_at > ?", (time.time(),)
+            ).fetchone()
+        return row[0]
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get a live value, refreshing its LRU position"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, accessed_at FROM cache WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            if row is not None and now - row[1] > self.TOUCH_INTERVAL_SECONDS:
+                try:
+                    self._conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+                except sqlite3.OperationalError:
+                    # Another worker is writing; the LRU position can be refreshed on a later hit
+                    self.write_conflicts += 1
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        try:
+            value = self.deserialize(row[0])
+        except Exception as e:
+            # Payload written by an incompatible version; treat it as a miss
+            print(f"⚠️  Dropping unreadable cache entry for {key}: {e}")
+            self.delete(key)
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, expires_at: float):
+        """Store a value until expires_at (epoch seconds), evicting LRU entries to stay in bounds"""
+        payload = self.serialize(value)
+        size = len(payload.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+
+        now = time.time()
+        with self._lock:
+            try:
+                previous = self._conn.execute("SELECT size FROM cache WHERE key = ?", (key,)).fetchone()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, expires_at, size, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, payload, expires_at, size, now)
+                )
+                self._entries += 0 if previous else 1
+                self._bytes += size - (previous[0] if previous else 0)
+                self._purge_expired_locked(now)
+                self._enforce_limits_locked(now)
+            except sqlite3.OperationalError as e:
+                # Locked by another worker for longer than busy_timeout; a cache write can be skipped
+                self.write_conflicts += 1
+                print(f"⚠️  Skipped cache write for {key}: {e}")
+
+    def delete(self, key: str):
+        """Remove a key if present"""
+        with self._lock:
+            try:
+                row = self._conn.execute("SELECT size FROM cache WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                    self._entries -= 1
+                    self._bytes -= row[0]
+            except sqlite3.OperationalError as e:
+                # Locked by another worker; the entry stays until a later delete, overwrite or expiry
+                self.write_conflicts += 1
+                print(f"⚠️  Skipped cache delete for {key}: {e}")
+
+    def values(self) -> List[Any]:
+        """All live values, least recently used first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT value FROM cache WHERE expires_at > ? ORDER BY accessed_at", (time.time(),)
+            ).fetchall()
+
+        values = []
+        for (payload,) in rows:
+            try:
+                values.append(self.deserialize(payload))
+            except Exception:
+                continue
+        return values
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+            self._entries = 0
+            self._bytes = 0
+
+    def purge_expired(self):
+        """Drop expired entries (uses the expires_at index, no full scan)"""
+        with self._lock:
+            try:
+                self._purge_expired_locked(time.time())
+            except sqlite3.OperationalError:
+                # Another worker holds the write lock; whoever writes next purges them
+                self.write_conflicts += 1
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics (hit/miss counters are per process)"""
+        with self._lock:
+            entries, total_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache WHERE expires_at > ?", (time.time(),)
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "bytes": total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "write_conflicts": self.write_conflicts,
+        }
+
+    def _recount_locked(self, now: float):
+        self._entries, self._bytes = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache"
+        ).fetchone()
+        self._counted_at = now
+
+    def _purge_expired_locked(self, now: float):
+        # Both statements use the expires_at index, so this only touches the expired rows
+        expired, expired_bytes = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache WHERE expires_at <= ?", (now,)
+        ).fetchone()
+        if expired:
+            self._conn.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+            self._entries -= expired
+            self._bytes -= expired_bytes
+            self.expirations += expired
+
+    def _enforce_limits_locked(self, now: float):
+        if now - self._counted_at > self.RECOUNT_INTERVAL_SECONDS:
+            self._recount_locked(now)
+        entries, total_bytes = self._entries, self._bytes
+        if entries <= self.max_entries and total_bytes <= self.max_bytes:
+            return
+
+        # Walk from least recently used until both limits are met
+        evict = []
+        for key, size in self._conn.execute("SELECT key, size FROM cache ORDER BY accessed_at"):
+            if entries <= self.max_entries and total_bytes <= self.max_bytes:
+                break
+            evict.append((key,))
+            entries -= 1
+            total_bytes -= size
+
+        self._conn.executemany("DELETE FROM cache WHERE key = ?", evict)
+        self.evictions += len(evict)
+        self._entries, self._bytes = entries, total_bytes
+
+class AIResponseCache:
+    """Parsed AI responses addressed by a hash of prompt template, page text and model name"""
+
+    def __init__(self, ttl_seconds: float = 7 * 24 * 3600, max_entries: int = 5000,
+                 max_bytes: int = 32 * 1024 * 1024, path: Optional[str] = None):
+        self.ttl_seconds = ttl_seconds
+        # Entries are {"expires_at": ..., "profiles": [...]} so a disk hit can be promoted with its real expiry
+        self.memory = LRUCache(max_entries=max_entries, max_bytes=max_bytes, sizeof=lambda entry: len(json.dumps(entry)))
+        self.disk = SQLiteCache(
+            path,
+            serialize=json.dumps,
+            deserialize=json.loads,
+            max_entries=max_entries,
+            max_bytes=max_bytes
+        ) if path else None
+
+    @staticmethod
+    def make_key(prompt_template: str, content: str, model_name: str) -> str:
+        """Content address: any change to the prompt, the page text or the model is a different key"""
+        digest = hashlib.sha256()
+        for part in (model_name, prompt_template, content):
+            digest.update(part.encode('utf-8'))
+            # Separator so ("ab", "c") and ("a", "bc") hash differently
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        entry = self.memory.get(key)
+        if entry is None and self.disk is not None:
+            entry = self.disk.get(key)
+            if entry is not None:
+                self.memory.set(key, entry, entry["expires_at"])
+        return entry["profiles"] if entry is not None else None
+
+    def set(self, key: str, profiles: List[Dict[str, Any]]):
+        entry = {"expires_at": time.time() + self.ttl_seconds, "profiles": profiles}
+        self.memory.set(key, entry, entry["expires_at"])
+        if self.disk is not None:
+            self.disk.set(key, entry, entry["expires_at"])
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def close(self):
+        if self.disk is not None:
+            self.disk.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "ttl_seconds": self.ttl_seconds,
+            "memory": self.memory.get_stats(),
+            "disk": self.disk.get_stats() if self.disk is not None else None,
+        }
@@ -0,0 +1,81 @@
+from typing import List, Optional, Set, Tuple
+
+from models import Profile
+
+def normalize_key(text: str) -> str:
+    """Lowercase with all whitespace removed (names/titles that differ only in spacing are equal)"""
+    return ''.join(text.lower().split())
+
+def _initial_blocks(name: str) -> Tuple[Optional[Tuple[str, str]], Optional[Tuple[str, str]]]:
+    """(block this name is indexed under, block it probes) for the initials-vs-full-name rule"""
+    parts = name.lower().split()
+    if len(parts) > 1:
+        initial = parts[0][0].upper()
+        return ('full_name', initial), ('initial', initial)
+    # Names are lowercased first, so only case-less single characters count as initials
+    if len(parts) == 1 and len(parts[0]) == 1 and parts[0].upper() == parts[0]:
+        initial = parts[0].upper()
+        return ('initial', initial), ('full_name', initial)
+    return None, None
+
+class DedupIndex:
+    """Kept profiles indexed by blocking key, so each candidate is only compared within its blocks"""
+
+    def __init__(self):
+        # (block, company) and (block, normalized title) for every kept, named profile
+        self._companies: Set[Tuple[Tuple[str, str], str]] = set()
+        self._titles: Set[Tuple[Tuple[str, str], str]] = set()
+
+    def is_similar(self, profile: Profile) -> bool:
+        """Same name (or initial vs full name) as a kept profile with the same company or a similar title"""
+        if not profile.name:
+            return False
+
+        name_block = ('name', normalize_key(profile.name))
+        _, initial_probe = _initial_blocks(profile.name)
+        title = normalize_key(profile.title) if profile.title else None
+
+        for block in (name_block, initial_probe):
+            if block is None:
+                continue
+            if profile.company and (block, profile.company) in self._companies:
+                return True
+            if title is not None and (block, title) in self._titles:
+                return True
+        return False
+
+    def add(self, profile: Profile):
+        """Index a kept profile"""
+        if not profile.name:
+            return
+
+        name_block = ('name', normalize_key(profile.name))
+        initial_block, _ = _initial_blocks(profile.name)
+        title = normalize_key(profile.title) if profile.title else None
+
+        for block in (name_block, initial_block):
+            if block is None:
+                continue
+            if profile.company:
+                self._companies.add((block, profile.company))
+            if title is not None:
+                self._titles.add((block, title))
+
+def remove_duplicates(profiles: List[Profile]) -> List[Profile]:
+    """Keep the highest-confidence profile of each person, in near-linear time"""
+    seen = set()
+    index = DedupIndex()
+    unique_profiles = []
+
+    # Sort profiles by confidence (highest first) to keep best quality
+    for profile in sorted(profiles, key=lambda x: x.confidence, reverse=True):
+        if index.is_similar(profile):
+            continue
+
+        identifier = f"{profile.name or 'unknown'}_{profile.company or 'no-company'}"
+        if identifier not in seen:
+            seen.add(identifier)
+            index.add(profile)
+            unique_profiles.append(profile)
+
+    return unique_profiles
@@ -0,0 +1,195 @@
+import itertools
+import uuid
+from typing import Dict, Hashable, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from models import Person, Profile, SocialLinks
+from dedup import normalize_key
+from url_utils import canonicalize_url
+
+# Links that identify one person; a shared company website would merge a whole team
+IDENTITY_PLATFORMS = ['linkedin', 'twitter', 'github', 'instagram', 'facebook']
+
+# Query parameters that name the account, as in facebook.com/profile.php?id=...
+IDENTITY_PARAMS = {'id', 'screen_name'}
+
+# First path segments of organization pages and share/intent links, which a whole team can carry
+NON_PERSON_SEGMENTS = {'company', 'school', 'showcase', 'groups', 'pages', 'orgs', 'intent', 'hashtag', 'sharing'}
+
+def social_key(link: str) -> Optional[str]:
+    """Scheme-, case- and www-insensitive form of a person's profile link, or None if it doesn't identify one"""
+    if '://' not in link:
+        link = f"https://{link}"
+    parts = urlsplit(canonicalize_url(link))
+    segment = parts.path.strip('/').split('/')[0].lower()
+    if not segment or segment in NON_PERSON_SEGMENTS or segment.startswith('share'):
+        return None
+
+    host = parts.netloc[4:] if parts.netloc.startswith('www.') else parts.netloc
+    key = f"{host}{parts.path.lower()}"
+    params = sorted((name, value) for name, value in parse_qsl(parts.query) if name.lower() in IDENTITY_PARAMS)
+    if params:
+        key += '?' + urlencode(params).lower()
+    return key
+
+def match_keys(profile: Profile) -> List[Hashable]:
+    """Keys that, when shared, mean two profiles describe the same person"""
+    keys: List[Hashable] = []
+    if profile.email and profile.email.strip():
+        keys.append(('email', profile.email.strip().lower()))
+
+    for platform in IDENTITY_PLATFORMS:
+        link = getattr(profile.social_links, platform)
+        key = social_key(link) if link else None
+        if key:
+            keys.append(('social', key))
+
+    # A name alone is too weak; it must agree on company or title as well
+    name = normalize_key(profile.name) if profile.name else ''
+    if name:
+        if profile.company and profile.company.strip():
+            keys.append(('name_company', name, profile.company.strip().lower()))
+        if profile.title and profile.title.strip():
+            keys.append(('name_title', name, normalize_key(profile.title)))
+    return keys
+
+def fingerprint(profile: Profile) -> str:
+    """Identity of a profile record across re-scrapes of the same page"""
+    return '|'.join([
+        canonicalize_url(profile.extracted_from),
+        normalize_key(profile.name or ''),
+        normalize_key(profile.title or ''),
+        (profile.email or '').strip().lower(),
+    ])
+
+class EntityIndex:
+    """Incremental union-find over profiles sharing an email, social link, or name + company/title"""
+
+    def __init__(self, max_profiles: int = 50000):
+        self.max_profiles = max_profiles
+        self.clear()
+
+    def clear(self):
+        self._parent: Dict[int, int] = {}
+        self._size: Dict[int, int] = {}
+        # root -> fingerprint -> latest profile for that record
+        self._members: Dict[int, Dict[str, Profile]] = {}
+        self._person_ids: Dict[int, str] = {}
+        self._key_nodes: Dict[Hashable, int] = {}
+        self._fingerprint_nodes: Dict[str, int] = {}
+        self._node_ids = itertools.count()
+
+        self.merges = 0
+
+    def __len__(self) -> int:
+        """Number of distinct people"""
+        return len(self._members)
+
+    @property
+    def profile_count(self) -> int:
+        return len(self._fingerprint_nodes)
+
+    def is_full(self) -> bool:
+        return self.profile_count > self.max_profiles
+
+    def add(self, profile: Profile) -> str:
+        """Merge a profile into the index, returning the id of the person it belongs to"""
+        record = fingerprint(profile)
+        node = self._fingerprint_nodes.get(record)
+        if node is None:
+            node = next(self._node_ids)
+            self._parent[node] = node
+            self._size[node] = 1
+            self._members[node] = {}
+            self._person_ids[node] = str(uuid.uuid4())
+            self._fingerprint_nodes[record] = node
+
+        # Re-scraped records replace their previous version instead of piling up
+        self._members[self._find(node)][record] = profile
+
+        # Only the keys this profile carries are looked at - the rest of the index is untouched
+        for key in match_keys(profile):
+            other = self._key_nodes.get(key)
+            if other is None:
+                self._key_nodes[key] = node
+            else:
+                self._union(other, node)
+
+        return self._person_ids[self._find(node)]
+
+    def add_all(self, profiles: List[Profile]):
+        for profile in profiles:
+            self.add(profile)
+
+    def rebuild(self, profiles: List[Profile]):
+        """Start over from the newest profiles (oldest first), filling only half of max_profiles"""
+        self.clear()
+        # The free half means the next rebuild is at least max_profiles / 2 inserts away,
+        # even when the cache alone holds more profiles than the index may
+        keep = self.max_profiles // 2
+        self.add_all(profiles[len(profiles) - keep:] if len(profiles) > keep else profiles)
+
+    def get_people(self) -> List[Person]:
+        """Merged view of every person, most-sourced first"""
+        roots = sorted(self._members, key=lambda root: len(self._members[root]), reverse=True)
+        return [self._person(root) for root in roots]
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "people": len(self._members),
+            "profiles": self.profile_count,
+            "max_profiles": self.max_profiles,
+            "keys": len(self._key_nodes),
+            "merges": self.merges,
+        }
+
+    def _find(self, node: int) -> int:
+        root = node
+        while self._parent[root] != root:
+            root = self._parent[root]
+        # Path compression
+        while self._parent[node] != root:
+            self._parent[node], node = root, self._parent[node]
+        return root
+
+    def _union(self, a: int, b: int):
+        root_a, root_b = self._find(a), self._find(b)
+        if root_a == root_b:
+            return
+        # Union by size: the smaller member map is moved into the larger one
+        if self._size[root_a] < self._size[root_b]:
+            root_a, root_b = root_b, root_a
+        self._parent[root_b] = root_a
+        self._size[root_a] += self._size.pop(root_b)
+        self._members[root_a].update(self._members.pop(root_b))
+        del self._person_ids[root_b]
+        self.merges += 1
+
+    def _person(self, root: int) -> Person:
+        # Each field comes from the most confident profile that has it
+        members = sorted(self._members[root].values(), key=lambda p: p.confidence, reverse=True)
+
+        def best(field: str) -> Optional[str]:
+            return next((getattr(p, field) for p in members if getattr(p, field)), None)
+
+        social_links = SocialLinks(**{
+            platform: next((getattr(p.social_links, platform) for p in members
+                            if getattr(p.social_links, platform)), None)
+            for platform in SocialLinks.model_fields
+        })
+
+        return Person(
+            id=self._person_ids[root],
+            name=best('name'),
+            title=best('title'),
+            email=best('email'),
+            phone=best('phone'),
+            image=best('image'),
+            bio=best('bio'),
+            company=best('company'),
+            location=best('location'),
+            social_links=social_links,
+            sources=list(dict.fromkeys(p.extracted_from for p in members)),
+            profile_ids=[p.id for p in members],
+            confidence=members[0].confidence if members else 0.0
+        )
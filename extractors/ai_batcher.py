@@ -0,0 +1,85 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from rate_limiter import estimate_tokens
+
+# Parsed profiles for one page, or None when the batch couldn't answer for it
+PageResult = Optional[List[Dict[str, Any]]]
+
+class AIBatcher:
+    """Collects small pages for a short window and sends them to the model as one request"""
+
+    def __init__(self, run_batch: Callable[[List[str]], Awaitable[List[PageResult]]],
+                 max_wait_seconds: float = 0.2, max_tokens: int = 6000, max_pages: int = 8):
+        self.run_batch = run_batch
+        self.max_wait_seconds = max_wait_seconds
+        self.max_tokens = max_tokens
+        self.max_pages = max_pages
+
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._pending_tokens = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+        self.batches = 0
+        self.pages_batched = 0
+        self.pages_unanswered = 0
+
+    def accepts(self, content: str) -> bool:
+        """Only pages small enough to share a request with at least one other page are batched"""
+        return estimate_tokens(content) <= self.max_tokens // 2
+
+    async def submit(self, content: str) -> PageResult:
+        """Profiles for one page from a shared request; None means the caller should ask on its own"""
+        loop = asyncio.get_running_loop()
+        tokens = estimate_tokens(content)
+        if self._pending and self._pending_tokens + tokens > self.max_tokens:
+            self._flush()
+
+        future = loop.create_future()
+        self._pending.append((content, future))
+        self._pending_tokens += tokens
+
+        if len(self._pending) >= self.max_pages:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_seconds, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending, self._pending_tokens = self._pending, [], 0
+        if batch:
+            asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch: List[Tuple[str, asyncio.Future]]):
+        if len(batch) == 1:
+            # Nothing arrived to share the request with; a plain single-page call is cheaper
+            results: List[PageResult] = [None]
+        else:
+            try:
+                results = await self.run_batch([content for content, _ in batch])
+                self.batches += 1
+                self.pages_batched += len(batch)
+            except Exception as e:
+                print(f"❌ Batched AI request failed: {e}")
+                results = [None] * len(batch)
+
+        for (_, future), result in zip(batch, results):
+            if result is None:
+                self.pages_unanswered += 1
+            # A waiter whose scrape was cancelled no longer needs its answer
+            if not future.done():
+                future.set_result(result)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "max_wait_ms": round(self.max_wait_seconds * 1000),
+            "max_tokens": self.max_tokens,
+            "max_pages": self.max_pages,
+            "pending": len(self._pending),
+            "batches": self.batches,
+            "pages_batched": self.pages_batched,
+            "pages_unanswered": self.pages_unanswered,
+        }
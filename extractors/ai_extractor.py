@@ -1,16 +1,90 @@
 import google.generativeai as genai
-from bs4 import BeautifulSoup
-from typing import List, Optional, Dict, Any
+from google.api_core import exceptions as google_exceptions
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+import asyncio
 import json
-import re
+import random
 from urllib.parse import urljoin
 
 from models import Profile, SocialLinks
+from dedup import normalize_key
+from cache import AIResponseCache
+from rate_limiter import ModelRateLimiter, RetryBudget, estimate_tokens
+from extractors.ai_batcher import AIBatcher, PageResult
+from extractors.document import ParsedDocument
+from extractors.json_stream import JSONStreamParser, parse_json_object
+
+# Rate limited, or a server-side failure that a later attempt can get past
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+def is_rate_limit_error(error: Exception) -> bool:
+    return isinstance(error, google_exceptions.GoogleAPICallError) and error.code == 429
+
+def is_retryable_error(error: Exception) -> bool:
+    """Only rate limits and transient failures are retried; bad requests, auth errors etc. are final"""
+    if isinstance(error, google_exceptions.GoogleAPICallError):
+        return error.code in RETRYABLE_STATUS_CODES
+    return isinstance(error, (asyncio.TimeoutError, ConnectionError))
+
+T = TypeVar('T')
+
+def merge_chunk_profiles(chunk_results: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Profiles of every chunk in page order; a person seen in several chunks becomes one record"""
+    merged: List[Dict[str, Any]] = []
+    by_key: Dict[str, Dict[str, Any]] = {}
+    for profiles in chunk_results:
+        for profile in profiles:
+            if not isinstance(profile, dict):
+                continue
+            name, email = profile.get('name'), profile.get('email')
+            if isinstance(name, str) and name.strip():
+                key = 'name:' + normalize_key(name)
+            elif isinstance(email, str) and email.strip():
+                key = 'email:' + email.strip().lower()
+            else:
+                merged.append(profile)
+                continue
+            
+            kept = by_key.get(key)
+            if kept is None:
+                # Copied, since the chunk's profiles may be shared with the response cache
+                links = profile.get('socialLinks')
+                kept = by_key[key] = {**profile, 'socialLinks': dict(links) if isinstance(links, dict) else {}}
+                merged.append(kept)
+                continue
+            
+            # Fill the gaps of the first record from the later one, never overwrite
+            for field, value in profile.items():
+                if field == 'socialLinks':
+                    for platform, link in (value if isinstance(value, dict) else {}).items():
+                        if link and not kept['socialLinks'].get(platform):
+                            kept['socialLinks'][platform] = link
+                elif value and not kept.get(field):
+                    kept[field] = value
+    return merged
 
 class AIProfileExtractor:
-    def __init__(self, gemini_model=None):
+    def __init__(self, gemini_model=None, max_content_chars: int = 8000, max_chunks: int = 1,
+                 response_cache: Optional[AIResponseCache] = None,
+                 rate_limiter: Optional[ModelRateLimiter] = None,
+                 retry_budget: Optional[RetryBudget] = None):
         self.gemini_model = gemini_model
+        self.model_name = getattr(gemini_model, 'model_name', None) or 'unknown'
         self.max_retries = 3
+        # Shared with every other model caller, so quota is respected service-wide
+        self.rate_limiter = rate_limiter
+        self.retry_budget = retry_budget
+        # Jittered exponential backoff between retries of rate-limited/transient failures
+        self.backoff_base_seconds = 1.0
+        self.backoff_max_seconds = 30.0
+        # Page text budget per prompt; the projection stops walking the page once it is full
+        self.max_content_chars = max_content_chars
+        # Large pages are split at section boundaries into up to this many prompts, run concurrently
+        self.max_chunks = max_chunks
+        # Parsed responses by hash of prompt + page text + model, so unchanged pages skip the model call
+        self.response_cache = response_cache
+        # Packs concurrent small pages into one request when enabled (see enable_batching)
+        self.batcher: Optional[AIBatcher] = None
         
         # AI extraction prompt template
         self.extraction_prompt = """
@@ -62,18 +136,46 @@ class AIProfileExtractor:
         - Be conservative - quality over quantity
         - If unsure about a field, set it to null
         """
+        
+        # Appended to the extraction prompt when several pages share one request
+        self.batch_prompt = """
+        The content below comes from {count} separate web pages, each one between "=== PAGE n ===" and "=== END PAGE n ===".
+        Extract profiles from every page on its own and never move a person from one page to another.
+        Instead of a single "profiles" object, return one entry per page in this exact JSON format:
+        {{
+            "pages": [
+                {{"page": 1, "profiles": [ ...profiles of page 1 in the format above... ]}}
+            ]
+        }}
+        Include every page, with an empty profiles array when a page has none.
+        """
     
-    async def extract(self, soup: BeautifulSoup, url: str) -> List[Profile]:
-        """Extract profiles using AI analysis"""
+    def enable_batching(self, max_wait_seconds: float, max_tokens: int, max_pages: int):
+        """Send small pages that arrive within max_wait_seconds of each other as one model request"""
+        self.batcher = AIBatcher(self.extract_batch_with_ai, max_wait_seconds, max_tokens, max_pages)
+    
+    async def extract(self, document: ParsedDocument, url: str,
+                      on_profile: Optional[Callable[[Profile], None]] = None) -> List[Profile]:
+        """Extract profiles using AI analysis; on_profile sees each one as soon as the model has written it"""
         if not self.gemini_model:
             return []
         
+        emit = self.make_preview_emitter(url, on_profile) if on_profile is not None else None
+        
         try:
             # Clean HTML for AI analysis
-            cleaned_html = self.clean_html_for_ai(soup)
+            chunks = self.chunk_content(document)
             
             # Extract profiles using AI
-            ai_profiles = await self.extract_with_ai(cleaned_html, url)
+            if len(chunks) == 1:
+                ai_profiles = await self.extract_with_ai(chunks[0], url, emit)
+            else:
+                print(f"🧩 Splitting {url} into {len(chunks)} AI chunks")
+                # Each chunk waits on the shared limiter, so this is only as parallel as the quota allows;
+                # chunks skip the batcher, which would otherwise put them back into one oversized prompt
+                chunk_results = await asyncio.gather(*(self.extract_with_ai(chunk, url, emit, batchable=False)
+                                                       for chunk in chunks))
+                ai_profiles = merge_chunk_profiles(chunk_results)
             
             # Convert AI results to Profile objects
             profiles = []
@@ -88,89 +190,162 @@ class AIProfileExtractor:
             print(f"AI extraction error: {e}")
             return []
     
-    def clean_html_for_ai(self, soup: BeautifulSoup) -> str:
-        """Clean HTML content for better AI analysis"""
-        # Remove script and style elements
-        for script in soup(["script", "style", "nav", "footer", "header"]):
-            script.decompose()
-        
-        # Remove common noise elements
-        noise_selectors = [
-            '.advertisement', '.ads', '.banner', '.popup',
-            '.cookie-notice', '.newsletter', '.sidebar',
-            '.navigation', '.menu', '.breadcrumb'
-        ]
-        
-        for selector in noise_selectors:
-            for element in soup.select(selector):
-                element.decompose()
-        
-        # Get text content with some structure
-        text_content = []
+    def make_preview_emitter(self, url: str, on_profile: Callable[[Profile], None]) -> Callable[[Dict[str, Any]], None]:
+        """Convert each streamed AI profile and pass it to on_profile, once per distinct profile"""
+        emitted = set()
         
-        # Extract headings
-        for heading in soup.find_all(['h1', 'h2', 'h3']):
-            text_content.append(f"HEADING: {heading.get_text(strip=True)}")
+        def emit(ai_profile: Dict[str, Any]):
+            # A retried answer repeats the profiles it had already streamed
+            key = json.dumps(ai_profile, sort_keys=True, default=str)
+            if key not in emitted:
+                emitted.add(key)
+                profile = self.convert_ai_profile(ai_profile, url)
+                if profile:
+                    on_profile(profile)
         
-        # Extract paragraphs and divs
-        for element in soup.find_all(['p', 'div', 'span', 'a']):
-            text = element.get_text(strip=True)
-            if text and len(text) > 10:  # Only meaningful content
-                text_content.append(text)
+        return emit
+    
+    def clean_html_for_ai(self, document: ParsedDocument) -> str:
+        """Clean HTML content for better AI analysis"""
+        return document.cleaned_text(self.max_content_chars)
+    
+    def chunk_content(self, document: ParsedDocument) -> List[str]:
+        """Page text as budget-sized prompts (a single one when it fits or chunking is off)"""
+        if self.max_chunks > 1:
+            chunks = document.cleaned_chunks(self.max_content_chars, self.max_chunks)
+            if chunks:
+                return chunks
+        return [self.clean_html_for_ai(document)]
+    
+    async def extract_with_ai(self, html_content: str, url: str,
+                              on_profile: Optional[Callable[[Dict[str, Any]], None]] = None,
+                              batchable: bool = True) -> List[Dict[str, Any]]:
+        """Extract profiles using Gemini AI (streamed to on_profile when given, except for batched pages)"""
+        cache_key = None
+        if self.response_cache is not None:
+            cache_key = self.response_cache.make_key(self.extraction_prompt, html_content, self.model_name)
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                print(f"🎯 AI response cache hit for {url}")
+                return cached
         
-        # Extract links
-        for link in soup.find_all('a', href=True):
-            href = link.get('href')
-            text = link.get_text(strip=True)
-            if text and href:
-                text_content.append(f"LINK: {text} -> {href}")
+        profiles = None
+        if batchable and self.batcher is not None and self.batcher.accepts(html_content):
+            # None when the page ended up alone or the shared answer left it out
+            profiles = await self.batcher.submit(html_content)
+        if profiles is None:
+            full_prompt = f"{self.extraction_prompt}\n\nHTML Content:\n{html_content}"
+            profiles = await self.call_model(full_prompt, self.parse_page_response, on_profile)
+        if profiles is None:
+            return []
         
-        return "\n".join(text_content)
+        self.remember_response(cache_key, profiles)
+        return profiles
+    
+    async def extract_batch_with_ai(self, contents: List[str]) -> List[PageResult]:
+        """One request for several pages, split back into each page's profiles (None where missing)"""
+        sections = [f"=== PAGE {number} ===\n{content}\n=== END PAGE {number} ==="
+                    for number, content in enumerate(contents, 1)]
+        full_prompt = (f"{self.extraction_prompt}\n{self.batch_prompt.format(count=len(contents))}"
+                       f"\n\nHTML Content:\n" + "\n\n".join(sections))
+        results = await self.call_model(full_prompt, lambda text: self.parse_batch_response(text, len(contents)))
+        return results or [None] * len(contents)
     
-    async def extract_with_ai(self, html_content: str, url: str) -> List[Dict[str, Any]]:
-        """Extract profiles using Gemini AI"""
+    async def call_model(self, full_prompt: str, parse: Callable[[str], Optional[T]],
+                         on_profile: Optional[Callable[[Dict[str, Any]], None]] = None) -> Optional[T]:
+        """Run the prompt under the shared limiter and retry policy; None if no usable answer came back"""
+        prompt_tokens = estimate_tokens(full_prompt)
+        if self.retry_budget is not None:
+            self.retry_budget.record_call()
+        
         for attempt in range(self.max_retries):
+            if attempt > 0 and self.retry_budget is not None and not self.retry_budget.can_retry():
+                print("⚠️  AI retry budget exhausted, giving up on this request")
+                return None
+            
             try:
-                # Prepare the prompt
-                full_prompt = f"{self.extraction_prompt}\n\nHTML Content:\n{html_content[:8000]}"  # Limit content length
-                
-                # Add delay between requests to avoid rate limiting (2-3 seconds)
-                import asyncio
-                if attempt == 0:
-                    await asyncio.sleep(1)  # 1s delay for first request
-                else:
-                    await asyncio.sleep(2 + attempt)  # 2s, 3s, 4s delays for retries
+                # Wait for request/token quota only when it is actually used up
+                if self.rate_limiter is not None:
+                    await self.rate_limiter.acquire(prompt_tokens)
                 
                 # Generate response
+                if on_profile is not None:
+                    return parse(await self.generate_streamed(full_prompt, on_profile))
                 response = await self.gemini_model.generate_content_async(full_prompt)
-                
-                # Parse the response
-                if response.text:
-                    # Try to extract JSON from the response
-                    json_match = re.search(r'\{.*\}', response.text, re.DOTALL)
-                    if json_match:
-                        json_str = json_match.group()
-                        result = json.loads(json_str)
-                        
-                        if 'profiles' in result and isinstance(result['profiles'], list):
-                            return result['profiles']
-                
-                # If no valid JSON found, try to parse the text manually
-                return self.parse_ai_response_manually(response.text)
+                return parse(response.text)
                 
             except json.JSONDecodeError as e:
+                # Malformed output says nothing about quota; ask again without backing off
                 print(f"JSON parsing error (attempt {attempt + 1}): {e}")
-                if attempt == self.max_retries - 1:
-                    return []
                 continue
                 
             except Exception as e:
                 print(f"AI extraction error (attempt {attempt + 1}): {e}")
-                if attempt == self.max_retries - 1:
-                    return []
-                continue
+                if not is_retryable_error(e) or attempt == self.max_retries - 1:
+                    return None
+                
+                delay = self.backoff_delay(attempt)
+                if is_rate_limit_error(e) and self.rate_limiter is not None:
+                    # Every caller sharing the quota waits this out in acquire(), not just this one
+                    self.rate_limiter.pause(delay)
+                else:
+                    await asyncio.sleep(delay)
         
-        return []
+        return None
+    
+    async def generate_streamed(self, full_prompt: str, on_profile: Callable[[Dict[str, Any]], None]) -> str:
+        """Stream the answer, handing each profile object to on_profile as soon as it is complete"""
+        parser = JSONStreamParser('profiles')
+        parts = []
+        response = await self.gemini_model.generate_content_async(full_prompt, stream=True)
+        async for chunk in response:
+            parts.append(chunk.text)
+            for ai_profile in parser.feed(chunk.text):
+                on_profile(ai_profile)
+        return ''.join(parts)
+    
+    def parse_page_response(self, response_text: str) -> Optional[List[Dict[str, Any]]]:
+        """Profiles from a single-page answer; None for an empty answer, which is not worth caching"""
+        if not response_text:
+            return None
+        
+        # Try to extract JSON from the response
+        result = parse_json_object(response_text)
+        if result is not None:
+            if 'profiles' in result and isinstance(result['profiles'], list):
+                return result['profiles']
+        
+        # If no valid JSON found, try to parse the text manually
+        return self.parse_ai_response_manually(response_text)
+    
+    def parse_batch_response(self, response_text: str, count: int) -> List[PageResult]:
+        """Each page's profiles from a batched answer, keyed by the 1-based page number it was sent as"""
+        results: List[PageResult] = [None] * count
+        result = parse_json_object(response_text or '')
+        if result is None:
+            return results
+        
+        pages = result.get('pages')
+        for page in pages if isinstance(pages, list) else []:
+            if not isinstance(page, dict) or not isinstance(page.get('profiles'), list):
+                continue
+            try:
+                number = int(page.get('page'))
+            except (TypeError, ValueError):
+                continue
+            if 1 <= number <= count:
+                results[number - 1] = page['profiles']
+        return results
+    
+    def backoff_delay(self, attempt: int) -> float:
+        """Exponential backoff with jitter (half fixed, half random) so retries don't synchronize"""
+        ceiling = min(self.backoff_max_seconds, self.backoff_base_seconds * 2 ** attempt)
+        return ceiling / 2 + random.uniform(0, ceiling / 2)
+    
+    def remember_response(self, cache_key: Optional[str], profiles: List[Dict[str, Any]]):
+        """Cache a successfully parsed response (failed attempts are never cached)"""
+        if cache_key is not None:
+            self.response_cache.set(cache_key, profiles)
     
     def parse_ai_response_manually(self, response_text: str) -> List[Dict[str, Any]]:
         """Manually parse AI response if JSON parsing fails"""
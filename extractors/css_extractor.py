@@ -1,9 +1,12 @@
-from bs4 import BeautifulSoup, Tag
+from bs4 import Tag
 from typing import List, Optional, Dict, Any
 import re
 from urllib.parse import urljoin, urlparse
 
 from models import Profile, SocialLinks
+from extractors.document import ParsedDocument
+from extractors.element_index import ElementIndex
+from extractors.selector_plan import SelectorPlan
 
 class CSSProfileExtractor:
     def __init__(self):
@@ -79,6 +82,12 @@ class CSSProfileExtractor:
                 'a[href*="facebook.com"]', '.facebook', '[class*="facebook"]'
             ]
         }
+        
+        # Every field and social selector, compiled once (an invalid one raises here, at startup)
+        self.plan = SelectorPlan(
+            [selector for selectors in self.selectors.values() for selector in selectors] +
+            [pattern for patterns in self.social_patterns.values() for pattern in patterns]
+        )
     
     def is_valid_profile(self, name: str, title: str, bio: str) -> bool:
         """Check if extracted profile data is valid and meaningful"""
@@ -126,12 +135,12 @@ class CSSProfileExtractor:
         
         return True
 
-    def extract(self, soup: BeautifulSoup, url: str) -> List[Profile]:
+    def extract(self, document: ParsedDocument, url: str) -> List[Profile]:
         """Extract profiles using CSS selectors"""
         profiles = []
         
         # Find profile containers
-        profile_containers = self.find_profile_containers(soup)
+        profile_containers = self.find_profile_containers(document.index)
         
         for container in profile_containers:
             profile = self.extract_from_container(container, url)
@@ -140,9 +149,13 @@ class CSSProfileExtractor:
         
         return profiles
 
-    def looks_like_profile_container(self, element: Tag) -> bool:
+    def looks_like_profile_container(self, element: Tag, index: ElementIndex) -> bool:
         """Check if an element looks like it contains profile information"""
-        text = element.get_text().lower()
+        # Anything this short fails the length check below anyway; skip copying its text
+        if index.text_length(element) < 30:
+            return False
+        
+        text = index.text_of(element).lower()
         
         # Look for profile indicators
         profile_indicators = [
@@ -173,7 +186,7 @@ class CSSProfileExtractor:
         
         return True
 
-    def find_profile_containers(self, soup: BeautifulSoup) -> List[Tag]:
+    def find_profile_containers(self, index: ElementIndex) -> List[Tag]:
         """Find containers that might hold profile information"""
         containers = []
         
@@ -187,7 +200,7 @@ class CSSProfileExtractor:
         ]
         
         for selector in container_selectors:
-            containers.extend(soup.select(selector))
+            containers.extend(index.select(selector))
         
         # Remove duplicates while preserving order
         seen = set()
@@ -202,18 +215,21 @@ class CSSProfileExtractor:
     def extract_from_container(self, container: Tag, url: str) -> Optional[Profile]:
         """Extract profile information from a specific container"""
         try:
+            # One walk over the container finds the first match of every selector
+            matches = self.plan.first_matches(container)
+            
             # Extract basic information
-            name = self.extract_text(container, self.selectors['name'])
-            title = self.extract_text(container, self.selectors['title'])
-            email = self.extract_attribute(container, self.selectors['email'], 'href')
-            phone = self.extract_attribute(container, self.selectors['phone'], 'href')
-            image = self.extract_attribute(container, self.selectors['image'], 'src')
-            bio = self.extract_text(container, self.selectors['bio'])
-            company = self.extract_text(container, self.selectors['company'])
-            location = self.extract_text(container, self.selectors['location'])
+            name = self.extract_text(matches, self.selectors['name'])
+            title = self.extract_text(matches, self.selectors['title'])
+            email = self.extract_attribute(matches, self.selectors['email'], 'href')
+            phone = self.extract_attribute(matches, self.selectors['phone'], 'href')
+            image = self.extract_attribute(matches, self.selectors['image'], 'src')
+            bio = self.extract_text(matches, self.selectors['bio'])
+            company = self.extract_text(matches, self.selectors['company'])
+            location = self.extract_text(matches, self.selectors['location'])
             
             # Extract social links
-            social_links = self.extract_social_links(container)
+            social_links = self.extract_social_links(container, matches)
             
             # Clean up email (remove mailto:)
             if email and email.startswith('mailto:'):
@@ -252,51 +268,42 @@ class CSSProfileExtractor:
         
         return None
     
-    def extract_text(self, container: Tag, selectors: List[str]) -> Optional[str]:
+    def extract_text(self, matches: Dict[str, Tag], selectors: List[str]) -> Optional[str]:
         """Extract text content using multiple selectors"""
         for selector in selectors:
-            try:
-                element = container.select_one(selector)
-                if element:
-                    text = element.get_text(strip=True)
-                    if text and len(text) > 2:  # Minimum meaningful length
-                        return text
-            except:
-                continue
+            element = matches.get(selector)
+            if element:
+                text = element.get_text(strip=True)
+                if text and len(text) > 2:  # Minimum meaningful length
+                    return text
         return None
     
-    def extract_attribute(self, container: Tag, selectors: List[str], attr: str) -> Optional[str]:
+    def extract_attribute(self, matches: Dict[str, Tag], selectors: List[str], attr: str) -> Optional[str]:
         """Extract attribute value using multiple selectors"""
         for selector in selectors:
-            try:
-                element = container.select_one(selector)
-                if element:
-                    value = element.get(attr)
-                    if value:
-                        return value
-            except:
-                continue
+            element = matches.get(selector)
+            if element:
+                value = element.get(attr)
+                if value:
+                    return value
         return None
     
-    def extract_social_links(self, container: Tag) -> SocialLinks:
+    def extract_social_links(self, container: Tag, matches: Dict[str, Tag]) -> SocialLinks:
         """Extract social media links"""
         social_links = SocialLinks()
         
         for platform, patterns in self.social_patterns.items():
             for pattern in patterns:
-                try:
-                    element = container.select_one(pattern)
-                    if element:
-                        href = element.get('href')
-                        if href:
-                            # Make URL absolute
-                            if not href.startswith(('http://', 'https://')):
-                                href = urljoin(container.get('data-url', ''), href)
-                            
-                            setattr(social_links, platform, href)
-                            break
-                except:
-                    continue
+                element = matches.get(pattern)
+                if element:
+                    href = element.get('href')
+                    if href:
+                        # Make URL absolute
+                        if not href.startswith(('http://', 'https://')):
+                            href = urljoin(container.get('data-url', ''), href)
+                        
+                        setattr(social_links, platform, href)
+                        break
         
         return social_links
     
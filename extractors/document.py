@@ -0,0 +1,244 @@
+from bs4 import BeautifulSoup, Tag
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+import os
+
+from extractors.element_index import ElementIndex, TEXT_TYPES
+
+# Elements that carry no profile information and are hidden from AI analysis
+NOISE_TAGS = ["script", "style", "nav", "footer", "header"]
+
+NOISE_SELECTORS = [
+    '.advertisement', '.ads', '.banner', '.popup',
+    '.cookie-notice', '.newsletter', '.sidebar',
+    '.navigation', '.menu', '.breadcrumb'
+]
+
+# Elements whose text becomes a HEADING: line in the cleaned text
+HEADING_TAGS = {'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+
+# Elements that start a new line in the cleaned text; everything else is inline
+BLOCK_TAGS = {
+    'address', 'article', 'aside', 'blockquote', 'br', 'dd', 'div', 'dl', 'dt', 'figcaption',
+    'figure', 'form', 'hr', 'li', 'main', 'ol', 'p', 'pre', 'section', 'table', 'td', 'th', 'tr', 'ul'
+}
+
+# Plain lines that carry no profile information (links keep them, since the href does)
+BOILERPLATE_LINES = {'read more', 'learn more', 'see more', 'view profile', 'more info'}
+
+class ParserBackend:
+    """Pure-python parser (bs4's built-in html.parser) - always available"""
+    name = 'html.parser'
+
+    def is_available(self) -> bool:
+        return True
+
+    def parse(self, html: str) -> BeautifulSoup:
+        return BeautifulSoup(html, 'html.parser')
+
+class LxmlBackend(ParserBackend):
+    """libxml2-based tree builder; same BeautifulSoup API, several times faster"""
+    name = 'lxml'
+
+    def is_available(self) -> bool:
+        try:
+            import lxml  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def parse(self, html: str) -> BeautifulSoup:
+        return BeautifulSoup(html, 'lxml')
+
+PARSER_BACKENDS = {
+    backend.name: backend for backend in (ParserBackend, LxmlBackend)
+}
+
+_backend_instances: Dict[str, ParserBackend] = {}
+
+def get_parser_backend(name: Optional[str] = None) -> ParserBackend:
+    """Get a parser backend by name (defaults to $HTML_PARSER_BACKEND), falling back to html.parser"""
+    name = (name or os.getenv('HTML_PARSER_BACKEND', 'html.parser')).lower()
+    if name not in _backend_instances:
+        backend_class = PARSER_BACKENDS.get(name)
+        if backend_class is None:
+            print(f"⚠️  Unknown HTML parser backend '{name}', using html.parser")
+            backend = ParserBackend()
+        else:
+            backend = backend_class()
+            if not backend.is_available():
+                print(f"⚠️  HTML parser backend '{name}' is not installed, using html.parser")
+                backend = ParserBackend()
+        _backend_instances[name] = backend
+    return _backend_instances[name]
+
+def parse_html(html: str, backend: Optional[str] = None) -> BeautifulSoup:
+    """Parse HTML with the configured backend"""
+    return get_parser_backend(backend).parse(html)
+
+class ParsedDocument:
+    """One parse of a page, shared read-only by every extraction strategy"""
+
+    def __init__(self, soup: BeautifulSoup, url: Optional[str] = None):
+        self._soup = soup
+        # Built once, right after parsing, so no extractor has to walk the tree again
+        self._index = ElementIndex(soup, base_url=url) if soup is not None else None
+        # max_chars -> cleaned text (None is the unbounded projection)
+        self._cleaned_texts: Dict[Optional[int], str] = {}
+        # (chunk_chars, max_chunks) -> cleaned text split at section boundaries
+        self._cleaned_chunks: Dict[Tuple[int, int], List[str]] = {}
+
+    @classmethod
+    def from_html(cls, html: str, backend: Optional[str] = None, url: Optional[str] = None) -> 'ParsedDocument':
+        """Parse raw HTML into a document using the configured parser backend (url resolves relative links)"""
+        return cls(parse_html(html, backend), url)
+
+    @classmethod
+    def from_cleaned_text(cls, text: str) -> 'ParsedDocument':
+        """Text-only document for the AI extractors when parsing happened in another process"""
+        document = cls(None)
+        document._cleaned_texts[None] = text
+        return document
+
+    @property
+    def soup(self) -> BeautifulSoup:
+        """Read-only view of the parse tree - extractors must never modify it"""
+        return self._soup
+
+    @property
+    def index(self) -> ElementIndex:
+        """Elements by tag, class, id, itemprop and attribute, plus every anchor, in document order"""
+        return self._index
+
+    def cleaned_text(self, max_chars: Optional[int] = None) -> str:
+        """Text projection for AI analysis with noise elements skipped (the tree is left untouched)"""
+        if max_chars not in self._cleaned_texts:
+            if self._soup is None:
+                # Text-only document: the projection was built elsewhere, just apply the budget
+                self._cleaned_texts[max_chars] = self._cleaned_texts[None][:max_chars]
+            else:
+                self._cleaned_texts[max_chars] = self._build_cleaned_text(max_chars)
+        return self._cleaned_texts[max_chars]
+
+    def cleaned_chunks(self, chunk_chars: int, max_chunks: int) -> List[str]:
+        """Cleaned text in up to max_chunks pieces of at most chunk_chars, cut before HEADING: lines where possible"""
+        key = (chunk_chars, max_chunks)
+        if key not in self._cleaned_chunks:
+            if self._soup is None:
+                lines: Iterable[str] = self._cleaned_texts[None].split('\n')
+            else:
+                lines = self.iter_cleaned_lines()
+            self._cleaned_chunks[key] = split_into_chunks(lines, chunk_chars, max_chunks)
+        return self._cleaned_chunks[key]
+
+    def _find_noise(self) -> Set[int]:
+        """Ids of elements whose whole subtree is hidden from the cleaned text"""
+        noise = {id(element) for element in self._index.find_all(NOISE_TAGS)}
+        for selector in NOISE_SELECTORS:
+            noise.update(id(element) for element in self._index.select(selector))
+        return noise
+
+    def iter_cleaned_lines(self) -> Iterator[str]:
+        """Every visible text node exactly once, as lines with HEADING:/LINK: markers, in document order"""
+        noise = self._find_noise()
+        line: List[str] = []
+        # Last emitted line; equal text elsewhere on the page (a shared title or city) is kept
+        previous: List[Optional[str]] = [None]
+        strings = 0
+
+        def flush(prefix: str = '', suffix: str = '') -> Optional[str]:
+            """Close the current line; None if it is empty, boilerplate or repeats the line before it"""
+            text = ' '.join(line)
+            line.clear()
+            if not text or (not prefix and text.lower() in BOILERPLATE_LINES):
+                return None
+            text = f"{prefix}{text}{suffix}"
+            if text == previous[0]:
+                return None
+            previous[0] = text
+            return text
+
+        # (node, leaving, text nodes seen before it was entered)
+        stack: List[Tuple[object, bool, int]] = [(node, False, 0) for node in reversed(self._soup.contents)]
+        while stack:
+            node, leaving, entered_at = stack.pop()
+            if isinstance(node, Tag) and not leaving:
+                if id(node) in noise:
+                    continue
+                if node.name in HEADING_TAGS or node.name in BLOCK_TAGS or (node.name == 'a' and node.get('href')):
+                    closed = flush()
+                    if closed:
+                        yield closed
+                    stack.append((node, True, strings))
+                stack.extend((child, False, 0) for child in reversed(node.contents))
+                continue
+
+            if not leaving:
+                if type(node) in TEXT_TYPES:
+                    text = ' '.join(node.split())
+                    if text:
+                        line.append(text)
+                        strings += 1
+                continue
+
+            if node.name in HEADING_TAGS:
+                closed = flush("HEADING: ")
+            elif node.name in BLOCK_TAGS:
+                closed = flush()
+            elif line:
+                closed = flush("LINK: ", f" -> {node.get('href')}")
+            elif strings > entered_at:
+                # The link wraps block content that was already emitted line by line
+                line.append(node.get('href'))
+                closed = flush("LINK: ")
+            else:
+                closed = None
+            if closed:
+                yield closed
+
+        closed = flush()
+        if closed:
+            yield closed
+
+    def _build_cleaned_text(self, max_chars: Optional[int]) -> str:
+        text_content: List[str] = []
+        size = 0
+        for line in self.iter_cleaned_lines():
+            separator = 1 if text_content else 0
+            if max_chars is not None and size + separator + len(line) > max_chars:
+                # Budget reached: keep what fits and stop walking the tree
+                remaining = max_chars - size - separator
+                if remaining > 0:
+                    text_content.append(line[:remaining])
+                break
+            text_content.append(line)
+            size += separator + len(line)
+        return "\n".join(text_content)
+
+def split_into_chunks(lines: Iterable[str], chunk_chars: int, max_chunks: int) -> List[str]:
+    """Pack lines into chunks; a full chunk is cut before its last heading so a section stays whole"""
+    chunks: List[str] = []
+    current: List[str] = []
+    # Length of '\n'.join(current)
+    size = 0
+    # Position in `current` of the last HEADING: line that isn't its first line (0 = none)
+    section_start = 0
+
+    for line in lines:
+        line = line[:chunk_chars]
+        while current and size + 1 + len(line) > chunk_chars:
+            cut = section_start or len(current)
+            chunks.append('\n'.join(current[:cut]))
+            if len(chunks) == max_chunks:
+                # Budget reached: the rest of the page is never walked
+                return chunks
+            current = current[cut:]
+            size = len('\n'.join(current))
+            section_start = 0
+        if line.startswith('HEADING: ') and current:
+            section_start = len(current)
+        size += len(line) + (1 if current else 0)
+        current.append(line)
+
+    if current:
+        chunks.append('\n'.join(current))
+    return chunks
@@ -0,0 +1,293 @@
+import bisect
+import heapq
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Pattern, Sequence, Tuple
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup, CData, NavigableString, PageElement, Tag
+
+from extractors.selector_plan import (
+    SimpleSelector, attribute_value, class_tokens, compile_simple_selector, parse_simple_selector
+)
+
+# Same string types Tag.get_text() returns for ordinary elements
+TEXT_TYPES = (NavigableString, CData)
+
+class Anchor(NamedTuple):
+    position: int
+    element: Tag
+    # Stripped and, when the page URL is known, absolute
+    href: str
+
+def normalize_href(href: str, base_url: Optional[str]) -> str:
+    """Stripped href, resolved against the page's base URL when there is one"""
+    href = href.strip()
+    return urljoin(base_url, href) if base_url and href else href
+
+class ElementIndex:
+    """Every element of a parse tree recorded in one preorder walk, so extractors never re-walk it"""
+
+    def __init__(self, root: BeautifulSoup, base_url: Optional[str] = None):
+        self.root = root
+        # Page URL that relative hrefs resolve against; the page's first <base href> overrides it
+        self.base_url = base_url
+        self._base_seen = False
+        # Preorder position -> element, and position -> position of its last descendant
+        self.elements: List[Tag] = []
+        self._ends: List[int] = []
+        self._positions: Dict[int, int] = {}
+
+        # All of the page's get_text() strings joined once; each element owns the slice [start, end)
+        self.text = ''
+        self._text_starts: List[int] = []
+        self._text_ends: List[int] = []
+
+        # Posting lists of preorder positions, so every lookup comes back in document order
+        self.by_tag: Dict[str, List[int]] = defaultdict(list)
+        self.by_class: Dict[str, List[int]] = defaultdict(list)
+        self.by_id: Dict[str, List[int]] = defaultdict(list)
+        self.by_itemprop: Dict[str, List[int]] = defaultdict(list)
+        self.by_attribute: Dict[str, List[int]] = defaultdict(list)
+        # Attribute name -> sorted (value, position), built on the first [name^=prefix] lookup
+        self._attribute_values: Dict[str, List[Tuple[str, int]]] = {}
+        self.anchors: List[Anchor] = []
+        self._anchor_positions: List[int] = []
+        self._compiled: Dict[str, Optional[Tuple[SimpleSelector, Callable[[Tag], bool]]]] = {}
+
+        self._build()
+
+    def _build(self):
+        parts: List[str] = []
+        offset = 0
+        stack: List[Tuple[PageElement, bool]] = [(child, False) for child in reversed(self.root.contents)]
+        while stack:
+            node, leaving = stack.pop()
+            if not isinstance(node, Tag):
+                if type(node) in TEXT_TYPES:
+                    parts.append(node)
+                    offset += len(node)
+                continue
+
+            if leaving:
+                # Post-order: the subtree is done, so its last descendant and text end are known
+                position = self._positions[id(node)]
+                self._ends[position] = len(self.elements) - 1
+                self._text_ends[position] = offset
+                continue
+
+            position = len(self.elements)
+            self.elements.append(node)
+            self._ends.append(position)
+            self._text_starts.append(offset)
+            self._text_ends.append(offset)
+            self._positions[id(node)] = position
+            self._record(node, position)
+
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(node.contents))
+
+        self.text = ''.join(parts)
+
+    def _record(self, element: Tag, position: int):
+        self.by_tag[element.name.lower()].append(position)
+        for name in element.attrs:
+            self.by_attribute[name].append(position)
+        for token in dict.fromkeys(class_tokens(element)):
+            self.by_class[token].append(position)
+        for name, postings in (('id', self.by_id), ('itemprop', self.by_itemprop)):
+            value = attribute_value(element, name)
+            if value:
+                postings[value.strip()].append(position)
+        if element.name == 'base' and not self._base_seen and 'href' in element.attrs:
+            self._base_seen = True
+            self.base_url = normalize_href(attribute_value(element, 'href'), self.base_url) or self.base_url
+        if element.name == 'a' and 'href' in element.attrs:
+            self.anchors.append(Anchor(position, element, normalize_href(attribute_value(element, 'href'), self.base_url)))
+            self._anchor_positions.append(position)
+
+    def __len__(self) -> int:
+        return len(self.elements)
+
+    def _bounds(self, within: Optional[Tag]) -> Optional[Tuple[int, int]]:
+        """Half-open range of positions inside `within` (the whole document for the root)"""
+        if within is None or within is self.root:
+            return 0, len(self.elements)
+        position = self._positions.get(id(within))
+        if position is None or self.elements[position] is not within:
+            return None
+        return position + 1, self._ends[position] + 1
+
+    def text_of(self, element: Tag) -> str:
+        """element.get_text(), read from the memoized page text instead of walking the subtree"""
+        bounds = self._text_bounds(element)
+        if bounds is None:
+            return element.get_text()
+        return self.text[bounds[0]:bounds[1]]
+
+    def text_length(self, element: Tag) -> int:
+        """len(element.get_text()) in constant time"""
+        bounds = self._text_bounds(element)
+        if bounds is None:
+            return len(element.get_text())
+        return bounds[1] - bounds[0]
+
+    def _text_bounds(self, element: Tag) -> Optional[Tuple[int, int]]:
+        if element is self.root:
+            return 0, len(self.text)
+        position = self._positions.get(id(element))
+        # script/style/template keep their own string types, so get_text() differs for them
+        if (position is None or self.elements[position] is not element
+                or element.interesting_string_types != TEXT_TYPES):
+            return None
+        return self._text_starts[position], self._text_ends[position]
+
+    def _slice(self, postings: Sequence[int], bounds: Tuple[int, int]) -> Sequence[int]:
+        start, end = bounds
+        if start == 0 and end == len(self.elements):
+            return postings
+        return postings[bisect.bisect_left(postings, start):bisect.bisect_left(postings, end)]
+
+    def select(self, selector: str, within: Optional[Tag] = None) -> List[Tag]:
+        """Same elements, in the same order, as (within or root).select(selector)"""
+        bounds = self._bounds(within)
+        compiled = self._compile(selector)
+        if compiled is None or bounds is None:
+            return (within or self.root).select(selector)
+
+        parsed, matches = compiled
+        candidates = self._slice(self._candidates(*parsed), bounds)
+        return [self.elements[position] for position in candidates if matches(self.elements[position])]
+
+    def select_one(self, selector: str, within: Optional[Tag] = None) -> Optional[Tag]:
+        """Same as (within or root).select_one(selector), stopping at the first candidate that matches"""
+        bounds = self._bounds(within)
+        compiled = self._compile(selector)
+        if compiled is None or bounds is None:
+            return (within or self.root).select_one(selector)
+
+        parsed, matches = compiled
+        for position in self._slice(self._candidates(*parsed), bounds):
+            if matches(self.elements[position]):
+                return self.elements[position]
+        return None
+
+    def _compile(self, selector: str) -> Optional[Tuple[SimpleSelector, Callable[[Tag], bool]]]:
+        """Candidate tests and matcher for simple selectors joined by descendant combinators"""
+        if selector not in self._compiled:
+            self._compiled[selector] = compile_descendant_selector(selector)
+        return self._compiled[selector]
+
+    def _candidates(self, tag: Optional[str], classes: List[str], attributes) -> Sequence[int]:
+        """Smallest posting list guaranteed to contain every match; the selector itself filters it"""
+        if classes:
+            return self.by_class.get(classes[0], [])
+        for name, op, value in attributes:
+            if op == '=' and name in ('id', 'itemprop') and value and value == value.strip():
+                # `^value$` also matches a trailing newline, which the stripped key covers
+                return (self.by_id if name == 'id' else self.by_itemprop).get(value, [])
+            if op == '*=' and name == 'class' and value and len(value.split()) == 1:
+                # A substring without whitespace has to sit inside a single class token
+                return merge(postings for token, postings in self.by_class.items() if value in token)
+            if op == '^=' and value:
+                return self._prefix_postings(name, value)
+        if attributes:
+            return self.by_attribute.get(attributes[0][0], [])
+        if tag:
+            return self.by_tag.get(tag, [])
+        return range(len(self.elements))
+
+    def _prefix_postings(self, name: str, prefix: str) -> List[int]:
+        """Positions, in document order, whose `name` attribute starts with prefix"""
+        values = self._attribute_values.get(name)
+        if values is None:
+            values = sorted((attribute_value(self.elements[position], name), position)
+                            for position in self.by_attribute.get(name, []))
+            self._attribute_values[name] = values
+        positions = []
+        for value, position in values[bisect.bisect_left(values, (prefix,)):]:
+            if not value.startswith(prefix):
+                break
+            positions.append(position)
+        positions.sort()
+        return positions
+
+    def find_all(self, names: Iterable[str], within: Optional[Tag] = None,
+                 class_pattern: Optional[Pattern] = None) -> List[Tag]:
+        """Same as (within or root).find_all(names, class_=class_pattern) for a class regex"""
+        bounds = self._bounds(within)
+        if bounds is None:
+            if class_pattern is None:
+                return (within or self.root).find_all(list(names))
+            return (within or self.root).find_all(list(names), class_=class_pattern)
+
+        positions = self._slice(merge(self.by_tag.get(name, []) for name in names), bounds)
+        elements = [self.elements[position] for position in positions]
+        if class_pattern is None:
+            return elements
+        return [element for element in elements if class_matches(element, class_pattern)]
+
+    def anchors_within(self, within: Optional[Tag] = None) -> List[Anchor]:
+        """Every <a href> inside `within`, like within.find_all('a', href=True)"""
+        bounds = self._bounds(within)
+        if bounds is None:
+            return [Anchor(-1, link, normalize_href(attribute_value(link, 'href'), self.base_url))
+                    for link in within.find_all('a', href=True)]
+        start, end = bounds
+        return self.anchors[bisect.bisect_left(self._anchor_positions, start):
+                            bisect.bisect_left(self._anchor_positions, end)]
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "elements": len(self.elements),
+            "tags": len(self.by_tag),
+            "class_tokens": len(self.by_class),
+            "anchors": len(self.anchors),
+        }
+
+def compile_descendant_selector(selector: str) -> Optional[Tuple[SimpleSelector, Callable[[Tag], bool]]]:
+    """("A B C") -> (parsed C, matcher), or None when any part needs soupsieve"""
+    parts = selector.split()
+    parsed = [parse_simple_selector(part) for part in parts]
+    if not parts or any(part is None for part in parsed):
+        return None
+    matchers = [compile_simple_selector(part) for part in parts]
+    if len(matchers) == 1:
+        return parsed[-1], matchers[0]
+
+    subject, ancestors = matchers[-1], matchers[-2::-1]
+
+    def matches(element: Tag) -> bool:
+        if not subject(element):
+            return False
+        # Right to left, nearest matching ancestor first; soupsieve checks ancestors up to
+        # the document root, not just inside the element select() was called on
+        node = element.parent
+        for ancestor in ancestors:
+            while node is not None and not isinstance(node, BeautifulSoup) and not ancestor(node):
+                node = node.parent
+            if node is None or isinstance(node, BeautifulSoup):
+                return False
+            node = node.parent
+        return True
+
+    return parsed[-1], matches
+
+def merge(postings: Iterable[Sequence[int]]) -> List[int]:
+    """Union of sorted posting lists, still sorted"""
+    lists = [p for p in postings if p]
+    if len(lists) == 1:
+        return list(lists[0])
+    merged = []
+    for position in heapq.merge(*lists):
+        if not merged or merged[-1] != position:
+            merged.append(position)
+    return merged
+
+def class_matches(element: Tag, pattern: Pattern) -> bool:
+    """bs4's class_=<regex> rule: any single class, or the whole space-joined class list"""
+    classes = element.attrs.get('class')
+    if not classes:
+        return False
+    if isinstance(classes, str):
+        return pattern.search(classes) is not None
+    return any(pattern.search(cls) for cls in classes) or pattern.search(' '.join(classes)) is not None
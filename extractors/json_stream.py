@@ -0,0 +1,135 @@
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+# Body of a JSON string up to (not including) its closing quote or a dangling backslash
+STRING_BODY = re.compile(r'(?:[^"\\]|\\.)*', re.DOTALL)
+# Characters that change the scanner's state outside strings
+STRUCTURAL = re.compile(r'["{}\[\]:,]')
+
+class JSONStreamParser:
+    """Incremental scanner that decodes each object of the root's `array_key` array as soon as it closes"""
+
+    def __init__(self, array_key: Optional[str] = 'profiles'):
+        self.array_key = array_key
+        # Whether the root object had an `array_key` array
+        self.found_array = False
+        # Absolute offsets of the root object: text[start:end] is the whole {...}
+        self.start: Optional[int] = None
+        self.end: Optional[int] = None
+
+        self._buffer = ''
+        # Absolute offset of _buffer[0]; consumed text is dropped unless an item is still open
+        self._offset = 0
+        self._pos = 0
+        # '{', '[', or 'items' for the array whose objects are yielded
+        self._stack: List[str] = []
+        self._in_string = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        self._key: Optional[str] = None
+        self._item_start: Optional[int] = None
+
+    @property
+    def done(self) -> bool:
+        return self.end is not None
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        """Scan the next piece of the answer, returning the items completed by it"""
+        items: List[Dict[str, Any]] = []
+        if self.done:
+            return items
+        self._buffer += text
+        buffer = self._buffer
+        pos = self._pos
+
+        while pos < len(buffer) and not self.done:
+            if self._in_string:
+                end = STRING_BODY.match(buffer, pos).end()
+                if end >= len(buffer) or buffer[end] != '"':
+                    # Unterminated so far (possibly cut mid escape); wait for more text
+                    pos = end
+                    break
+                # Only short strings can be the key we are looking for
+                if self.array_key is not None and end - self._string_start == len(self.array_key):
+                    self._last_string = buffer[self._string_start:end]
+                else:
+                    self._last_string = None
+                self._in_string = False
+                pos = end + 1
+                continue
+
+            if not self._stack:
+                # Skip any preamble ("Here is the JSON:", ```json) up to the root object
+                root = buffer.find('{', pos)
+                if root < 0:
+                    pos = len(buffer)
+                    break
+                self.start = self._offset + root
+                self._stack.append('{')
+                pos = root + 1
+                continue
+
+            match = STRUCTURAL.search(buffer, pos)
+            if match is None:
+                pos = len(buffer)
+                break
+            char = match.group()
+            pos = match.end()
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = pos
+            elif char == ':':
+                self._key = self._last_string if self._stack[-1] == '{' else None
+            elif char == ',':
+                self._key = None
+            elif char == '[':
+                if self._stack == ['{'] and self.array_key is not None and self._key == self.array_key:
+                    self.found_array = True
+                    self._stack.append('items')
+                else:
+                    self._stack.append('[')
+            elif char == '{':
+                if self._stack[-1] == 'items':
+                    self._item_start = pos - 1
+                self._stack.append('{')
+                self._key = None
+            else:
+                self._stack.pop()
+                if not self._stack:
+                    self.end = self._offset + pos
+                elif char == '}' and self._stack[-1] == 'items':
+                    # Raises JSONDecodeError for a malformed item, like decoding the whole answer would
+                    items.append(json.loads(buffer[self._item_start:pos]))
+                    self._item_start = None
+
+        self._pos = pos
+        self._compact()
+        return items
+
+    def _compact(self):
+        """Forget text that no open item or string still needs, so long answers stay linear"""
+        keep = self._pos
+        if self._item_start is not None:
+            keep = min(keep, self._item_start)
+        if self._in_string:
+            keep = min(keep, self._string_start)
+        if keep == 0:
+            return
+        self._buffer = self._buffer[keep:]
+        self._offset += keep
+        self._pos -= keep
+        self._string_start -= keep
+        if self._item_start is not None:
+            self._item_start -= keep
+
+def parse_json_object(text: str) -> Optional[Dict[str, Any]]:
+    """First complete top-level {...} of a model answer (trailing text ignored), or None if there is none"""
+    parser = JSONStreamParser(array_key=None)
+    parser.feed(text)
+    if parser.start is None:
+        return None
+    if parser.end is None:
+        raise json.JSONDecodeError("Unterminated JSON object", text, parser.start)
+    return json.loads(text[parser.start:parser.end])
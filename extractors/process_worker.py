@@ -0,0 +1,57 @@
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Optional
+
+from models import Profile
+from extractors.css_extractor import CSSProfileExtractor
+from extractors.site_specific import SiteSpecificExtractor
+from extractors.document import ParsedDocument
+
+# Built once per worker process, on first use
+_site_extractor: Optional[SiteSpecificExtractor] = None
+_css_extractor: Optional[CSSProfileExtractor] = None
+
+def _get_extractors():
+    global _site_extractor, _css_extractor
+    if _site_extractor is None:
+        _site_extractor = SiteSpecificExtractor()
+        _css_extractor = CSSProfileExtractor()
+    return _site_extractor, _css_extractor
+
+def serialize_profiles(profiles: List[Profile]) -> str:
+    """Compact JSON array of profiles (unset fields dropped) for crossing the process boundary"""
+    return '[' + ','.join(profile.model_dump_json(exclude_none=True) for profile in profiles) + ']'
+
+def deserialize_profiles(payload: str) -> List[Profile]:
+    """Inverse of serialize_profiles"""
+    return [Profile.model_validate(item) for item in json.loads(payload)]
+
+def extract_in_process(html: bytes, url: str, max_profiles: int = 10, include_cleaned_text: bool = False,
+                       cpu_budget_seconds: float = 0, cleaned_text_chars: Optional[int] = None) -> Dict[str, Any]:
+    """Parse and run site-specific + CSS extraction entirely inside a worker process"""
+    # Only raw HTML comes in and only serialized profiles (plus the cleaned text when the
+    # AI strategy may need it) go back, so no parse tree is ever pickled
+    cpu_start = time.thread_time()
+
+    def over_budget() -> bool:
+        return cpu_budget_seconds > 0 and time.thread_time() - cpu_start >= cpu_budget_seconds
+
+    site_extractor, css_extractor = _get_extractors()
+    document = ParsedDocument.from_html(html.decode('utf-8', errors='replace'), url=url)
+
+    results: Dict[str, Any] = {"site_specific": None, "css_selectors": None, "cleaned_text": None}
+    found = 0
+    if not over_budget():
+        # The site-specific extractor is async but never awaits
+        site_profiles = asyncio.run(site_extractor.extract(document, url))
+        results["site_specific"] = serialize_profiles(site_profiles)
+        found += len(site_profiles)
+    if not over_budget():
+        css_profiles = css_extractor.extract(document, url)
+        results["css_selectors"] = serialize_profiles(css_profiles)
+        found += len(css_profiles)
+    if include_cleaned_text and found < max_profiles and not over_budget():
+        results["cleaned_text"] = document.cleaned_text(cleaned_text_chars)
+
+    return results
@@ -1,16 +1,18 @@
 import asyncio
 import httpx
-from bs4 import BeautifulSoup
 from typing import List, Optional, Dict, Any
 import json
-import re
 from urllib.parse import urljoin
 
 from models import Profile, SocialLinks
+from extractors.document import ParsedDocument
+from extractors.json_stream import parse_json_object
 
 class PuterAIProfileExtractor:
-    def __init__(self):
+    def __init__(self, max_content_chars: int = 8000):
         self.max_retries = 3
+        # Page text budget per prompt; the projection stops walking the page once it is full
+        self.max_content_chars = max_content_chars
         self.puter_api_url = "https://api.puter.com/v1/chat/completions"
         
         # AI extraction prompt template
@@ -61,11 +63,11 @@ class PuterAIProfileExtractor:
         Remember: Only extract REAL data that exists on the page. No fake data!
         """
     
-    async def extract(self, soup: BeautifulSoup, url: str) -> List[Profile]:
+    async def extract(self, document: ParsedDocument, url: str) -> List[Profile]:
         """Extract profiles using Puter AI analysis"""
         try:
             # Clean HTML for AI analysis
-            cleaned_html = self.clean_html_for_ai(soup)
+            cleaned_html = self.clean_html_for_ai(document)
             
             # Extract profiles using Puter AI
             ai_profiles = await self.extract_with_puter_ai(cleaned_html, url)
@@ -83,51 +85,16 @@ class PuterAIProfileExtractor:
             print(f"Puter AI extraction error: {e}")
             return []
     
-    def clean_html_for_ai(self, soup: BeautifulSoup) -> str:
+    def clean_html_for_ai(self, document: ParsedDocument) -> str:
         """Clean HTML content for better AI analysis"""
-        # Remove script and style elements
-        for script in soup(["script", "style", "nav", "footer", "header"]):
-            script.decompose()
-        
-        # Remove common noise elements
-        noise_selectors = [
-            '.advertisement', '.ads', '.banner', '.popup',
-            '.cookie-notice', '.newsletter', '.sidebar',
-            '.navigation', '.menu', '.breadcrumb'
-        ]
-        
-        for selector in noise_selectors:
-            for element in soup.select(selector):
-                element.decompose()
-        
-        # Get text content with some structure
-        text_content = []
-        
-        # Extract headings
-        for heading in soup.find_all(['h1', 'h2', 'h3']):
-            text_content.append(f"HEADING: {heading.get_text(strip=True)}")
-        
-        # Extract paragraphs and divs
-        for element in soup.find_all(['p', 'div', 'span', 'a']):
-            text = element.get_text(strip=True)
-            if text and len(text) > 10:  # Only meaningful content
-                text_content.append(text)
-        
-        # Extract links
-        for link in soup.find_all('a', href=True):
-            href = link.get('href')
-            text = link.get_text(strip=True)
-            if text and href:
-                text_content.append(f"LINK: {text} -> {href}")
-        
-        return "\n".join(text_content)
+        return document.cleaned_text(self.max_content_chars)
     
     async def extract_with_puter_ai(self, html_content: str, url: str) -> List[Dict[str, Any]]:
         """Extract profiles using Puter AI"""
         for attempt in range(self.max_retries):
             try:
                 # Prepare the prompt
-                full_prompt = f"{self.extraction_prompt}\n\nHTML Content:\n{html_content[:8000]}"  # Limit content length
+                full_prompt = f"{self.extraction_prompt}\n\nHTML Content:\n{html_content}"
                 
                 # Use Puter AI via their JavaScript API (we'll simulate this)
                 # For now, let's use a simple approach with their chat API
@@ -136,11 +103,8 @@ class PuterAIProfileExtractor:
                 # Parse the response
                 if response:
                     # Try to extract JSON from the response
-                    json_match = re.search(r'\{.*\}', response, re.DOTALL)
-                    if json_match:
-                        json_str = json_match.group()
-                        result = json.loads(json_str)
-                        
+                    result = parse_json_object(response)
+                    if result is not None:
                         if 'profiles' in result and isinstance(result['profiles'], list):
                             return result['profiles']
                 
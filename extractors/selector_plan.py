@@ -0,0 +1,107 @@
+import re
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import soupsieve
+from bs4 import Tag
+
+# A single compound selector: optional tag, then .classes and [attribute] tests, nothing else
+SIMPLE_SELECTOR = re.compile(r'^(?P<tag>[a-zA-Z][a-zA-Z0-9]*)?(?P<tests>(?:\.[\w-]+|\[[\w-]+(?:[\^$*]?="[^"]*")?\])+)?$')
+SIMPLE_TEST = re.compile(r'\.(?P<cls>[\w-]+)|\[(?P<attr>[\w-]+)(?:(?P<op>[\^$*]?=)"(?P<value>[^"]*)")?\]')
+
+# Same patterns soupsieve compiles for each attribute operator, so matches are identical
+ATTRIBUTE_PATTERNS = {
+    '=': r'^%s$',
+    '^=': r'^%s.*',
+    '$=': r'.*?%s$',
+    '*=': r'.*?%s.*',
+}
+
+def attribute_value(element: Tag, name: str) -> Optional[str]:
+    value = element.attrs.get(name)
+    if value is None:
+        return '' if name in element.attrs else None
+    return value if isinstance(value, str) else ' '.join(value)
+
+def class_tokens(element: Tag) -> Sequence[str]:
+    classes = element.attrs.get('class') or []
+    return classes.split() if isinstance(classes, str) else classes
+
+# (tag, classes, [(attribute, operator, value)]) of a simple compound selector
+SimpleSelector = Tuple[Optional[str], List[str], List[Tuple[str, Optional[str], Optional[str]]]]
+
+def parse_simple_selector(selector: str) -> Optional[SimpleSelector]:
+    """Split a simple compound selector into its tests, or None if it needs soupsieve"""
+    parsed = SIMPLE_SELECTOR.match(selector)
+    if not parsed or not (parsed.group('tag') or parsed.group('tests')):
+        return None
+
+    tag = parsed.group('tag').lower() if parsed.group('tag') else None
+    classes: List[str] = []
+    attributes = []
+    for test in SIMPLE_TEST.finditer(parsed.group('tests') or ''):
+        if test.group('cls'):
+            classes.append(test.group('cls'))
+        else:
+            attributes.append((test.group('attr').lower(), test.group('op'), test.group('value')))
+    return tag, classes, attributes
+
+def compile_simple_selector(selector: str) -> Optional[Callable[[Tag], bool]]:
+    """Plain-python matcher for a simple compound selector, or None if it needs soupsieve"""
+    parsed = parse_simple_selector(selector)
+    if parsed is None:
+        return None
+
+    tag, classes, tests = parsed
+    attributes = []
+    for name, op, value in tests:
+        if op:
+            # soupsieve never matches an empty substring/prefix/suffix test
+            pattern = re.escape(value) if value or op == '=' else r'(?!)'
+            attributes.append((name, re.compile(ATTRIBUTE_PATTERNS[op] % pattern, re.DOTALL)))
+        else:
+            attributes.append((name, None))
+
+    def matches(element: Tag) -> bool:
+        if tag is not None and element.name.lower() != tag:
+            return False
+        if classes:
+            element_classes = class_tokens(element)
+            if any(cls not in element_classes for cls in classes):
+                return False
+        for name, pattern in attributes:
+            value = attribute_value(element, name)
+            if value is None or (pattern is not None and pattern.match(value) is None):
+                return False
+        return True
+
+    return matches
+
+class SelectorPlan:
+    """Selectors compiled once, matched against a container in a single walk of its descendants"""
+
+    def __init__(self, selectors: Sequence[str]):
+        self.selectors: List[str] = list(dict.fromkeys(selectors))
+        self._matchers: List[Callable[[Tag], bool]] = []
+        for selector in self.selectors:
+            # Compile every selector up front so a bad one fails at startup, not per page
+            compiled = soupsieve.compile(selector)
+            self._matchers.append(compile_simple_selector(selector) or compiled.match)
+
+    def first_matches(self, container: Tag) -> Dict[str, Tag]:
+        """First descendant matching each selector, in document order - what select_one would return"""
+        found: Dict[str, Tag] = {}
+        remaining = list(range(len(self.selectors)))
+        for element in container.descendants:
+            if not isinstance(element, Tag):
+                continue
+            still_remaining = []
+            for index in remaining:
+                if self._matchers[index](element):
+                    found[self.selectors[index]] = element
+                else:
+                    still_remaining.append(index)
+            if len(still_remaining) != len(remaining):
+                remaining = still_remaining
+                if not remaining:
+                    break
+        return found
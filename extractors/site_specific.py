@@ -4,6 +4,8 @@ import re
 from urllib.parse import urljoin, urlparse
 
 from models import Profile, SocialLinks
+from extractors.document import ParsedDocument
+from extractors.element_index import ElementIndex
 
 class SiteSpecificExtractor:
     def __init__(self):
@@ -27,25 +29,27 @@ class SiteSpecificExtractor:
             }
         }
     
-    async def extract(self, soup: BeautifulSoup, url: str) -> List[Profile]:
+    async def extract(self, document: ParsedDocument, url: str) -> List[Profile]:
         """Extract profiles using site-specific strategies"""
+        soup = document.soup
+        index = document.index
         url_domain = urlparse(url).netloc.lower()
         
         # Try LinkedIn profile extraction
         if 'linkedin.com' in url_domain and '/in/' in url:
-            return await self.extract_linkedin_profile(soup, url)
+            return await self.extract_linkedin_profile(soup, url, index)
         
         # Try GitHub profile extraction
         if 'github.com' in url_domain:
-            return await self.extract_github_profile(soup, url)
+            return await self.extract_github_profile(soup, url, index)
         
         # Try Twitter profile extraction
         if 'twitter.com' in url_domain or 'x.com' in url_domain:
             return await self.extract_twitter_profile(soup, url)
         
         # Try company team page extraction
-        if self.is_company_team_page(soup, url):
-            return await self.extract_company_team(soup, url)
+        if self.is_company_team_page(soup, url, index):
+            return await self.extract_company_team(soup, url, index)
         
         return []
     
@@ -87,7 +91,7 @@ class SiteSpecificExtractor:
         
         return True
 
-    async def extract_linkedin_profile(self, soup: BeautifulSoup, url: str) -> List[Profile]:
+    async def extract_linkedin_profile(self, soup: BeautifulSoup, url: str, index: ElementIndex) -> List[Profile]:
         """Extract profile from LinkedIn profile page"""
         try:
             # LinkedIn profile selectors
@@ -136,8 +140,8 @@ class SiteSpecificExtractor:
             social_links.linkedin = url
             
             # Look for other social media links
-            for link in soup.find_all('a', href=True):
-                href = link.get('href', '')
+            for anchor in index.anchors:
+                href = anchor.href
                 if 'github.com' in href:
                     social_links.github = href
                 elif 'twitter.com' in href or 'x.com' in href:
@@ -167,7 +171,7 @@ class SiteSpecificExtractor:
         
         return []
     
-    async def extract_github_profile(self, soup: BeautifulSoup, url: str) -> List[Profile]:
+    async def extract_github_profile(self, soup: BeautifulSoup, url: str, index: ElementIndex) -> List[Profile]:
         """Extract profile from GitHub profile page"""
         try:
             # GitHub profile selectors
@@ -211,8 +215,8 @@ class SiteSpecificExtractor:
             social_links.github = url
             
             # Look for website and other links
-            for link in soup.find_all('a', href=True):
-                href = link.get('href', '')
+            for anchor in index.anchors:
+                href = anchor.href
                 if href.startswith('http') and 'github.com' not in href:
                     social_links.website = href
                 elif 'linkedin.com' in href:
@@ -294,22 +298,22 @@ class SiteSpecificExtractor:
         
         return []
     
-    async def extract_company_team(self, soup: BeautifulSoup, url: str) -> List[Profile]:
+    async def extract_company_team(self, soup: BeautifulSoup, url: str, index: ElementIndex) -> List[Profile]:
         """Extract team members from company team/leadership page"""
         profiles = []
         
         try:
             # Look for team member containers
-            team_containers = self.find_team_containers(soup)
+            team_containers = self.find_team_containers(index)
             
             for container in team_containers:
-                profile = self.extract_team_member(container, url)
+                profile = self.extract_team_member(container, url, index)
                 if profile and self.is_valid_team_profile(profile):
                     profiles.append(profile)
             
             # If no team containers found, try alternative approaches
             if not profiles:
-                profiles = self.extract_team_alternative(soup, url)
+                profiles = self.extract_team_alternative(index, url)
             
         except Exception as e:
             print(f"Company team extraction error: {e}")
@@ -335,7 +339,7 @@ class SiteSpecificExtractor:
         
         return True
     
-    def find_team_containers(self, soup: BeautifulSoup) -> List[Tag]:
+    def find_team_containers(self, index: ElementIndex) -> List[Tag]:
         """Find containers that likely contain team member information"""
         containers = []
         
@@ -349,10 +353,10 @@ class SiteSpecificExtractor:
         ]
         
         for selector in selectors:
-            elements = soup.select(selector)
+            elements = index.select(selector)
             for element in elements:
                 # Check if element contains profile-like information
-                if self.looks_like_profile_container(element):
+                if self.looks_like_profile_container(element, index):
                     containers.append(element)
         
         # Also look for grid layouts that might contain team members
@@ -362,16 +366,16 @@ class SiteSpecificExtractor:
         ]
         
         for selector in grid_selectors:
-            elements = soup.select(selector)
+            elements = index.select(selector)
             for element in elements:
-                if self.looks_like_profile_grid(element):
+                if self.looks_like_profile_grid(element, index):
                     containers.append(element)
         
         return containers
     
-    def looks_like_profile_container(self, element: Tag) -> bool:
+    def looks_like_profile_container(self, element: Tag, index: ElementIndex) -> bool:
         """Check if an element looks like it contains profile information"""
-        text = element.get_text().lower()
+        text = index.text_of(element).lower()
         
         # Look for profile indicators
         profile_indicators = [
@@ -382,28 +386,28 @@ class SiteSpecificExtractor:
         indicator_count = sum(1 for indicator in profile_indicators if indicator in text)
         return indicator_count >= 2  # At least 2 profile indicators
     
-    def looks_like_profile_grid(self, element: Tag) -> bool:
+    def looks_like_profile_grid(self, element: Tag, index: ElementIndex) -> bool:
         """Check if an element looks like a grid of profiles"""
         # Look for multiple profile-like elements
-        profile_elements = element.find_all(['h1', 'h2', 'h3', 'h4', 'p', 'div'], 
-                                         class_=re.compile(r'name|title|position|role|bio', re.I))
+        profile_elements = index.find_all(['h1', 'h2', 'h3', 'h4', 'p', 'div'], within=element,
+                                          class_pattern=re.compile(r'name|title|position|role|bio', re.I))
         
         return len(profile_elements) >= 3  # At least 3 profile elements
     
-    def extract_team_alternative(self, soup: BeautifulSoup, url: str) -> List[Profile]:
+    def extract_team_alternative(self, index: ElementIndex, url: str) -> List[Profile]:
         """Alternative method to extract team information when containers aren't found"""
         profiles = []
         
         try:
             # Look for headings that might be names
-            headings = soup.find_all(['h1', 'h2', 'h3', 'h4'])
+            headings = index.find_all(['h1', 'h2', 'h3', 'h4'])
             
             for heading in headings:
                 text = heading.get_text(strip=True)
                 if self.looks_like_name(text):
                     # Look for title/position in nearby elements
-                    title = self.find_nearby_title(heading)
-                    company = self.extract_company_from_context(heading, soup)
+                    title = self.find_nearby_title(heading, index)
+                    company = self.extract_company_from_context(heading, index)
                     
                     if title or company:
                         profile = Profile(
@@ -445,14 +449,14 @@ class SiteSpecificExtractor:
         
         return False
     
-    def find_nearby_title(self, heading: Tag) -> Optional[str]:
+    def find_nearby_title(self, heading: Tag, index: ElementIndex) -> Optional[str]:
         """Find job title in elements near the heading"""
         # Look in the same container
         parent = heading.parent
         if parent:
             # Look for title-like text
-            title_elements = parent.find_all(['p', 'span', 'div'], 
-                                           class_=re.compile(r'title|position|role|job', re.I))
+            title_elements = index.find_all(['p', 'span', 'div'], within=parent,
+                                            class_pattern=re.compile(r'title|position|role|job', re.I))
             for element in title_elements:
                 text = element.get_text(strip=True)
                 if text and len(text) > 3 and text != heading.get_text(strip=True):
@@ -460,10 +464,11 @@ class SiteSpecificExtractor:
         
         return None
     
-    def extract_company_from_context(self, heading: Tag, soup: BeautifulSoup) -> Optional[str]:
+    def extract_company_from_context(self, heading: Tag, index: ElementIndex) -> Optional[str]:
         """Extract company name from page context"""
         # Look for company name in page title, headings, or common locations
-        page_title = soup.find('title')
+        titles = index.find_all(['title'])
+        page_title = titles[0] if titles else None
         if page_title:
             title_text = page_title.get_text()
             # Extract company name from title (often "Company Name - About" or similar)
@@ -472,7 +477,7 @@ class SiteSpecificExtractor:
                 return company
         
         # Look for company name in main headings
-        main_headings = soup.find_all(['h1', 'h2'], class_=re.compile(r'main|primary|hero', re.I))
+        main_headings = index.find_all(['h1', 'h2'], class_pattern=re.compile(r'main|primary|hero', re.I))
         for h in main_headings:
             text = h.get_text(strip=True)
             if text and len(text) < 50:  # Reasonable company name length
@@ -499,33 +504,33 @@ class SiteSpecificExtractor:
         
         return True
     
-    def extract_team_member(self, container: Tag, url: str) -> Optional[Profile]:
+    def extract_team_member(self, container: Tag, url: str, index: ElementIndex) -> Optional[Profile]:
         """Extract individual team member profile"""
         try:
             name = self.extract_text(container, [
                 'h3', 'h4', '.name', '.member-name', '.employee-name',
                 '.profile-name', '.person-name', '[class*="name"]'
-            ])
+            ], index=index)
             
             title = self.extract_text(container, [
                 '.title', '.position', '.role', '.job-title',
                 '.member-title', '.employee-title', '[class*="title"]'
-            ])
+            ], index=index)
             
             bio = self.extract_text(container, [
                 '.bio', '.description', '.about', '.summary',
                 '.member-bio', '.employee-bio', '[class*="bio"]'
-            ])
+            ], index=index)
             
             image = self.extract_attribute(container, [
                 'img', '.image img', '.photo img', '.avatar img',
                 '.member-image img', '.employee-image img'
-            ], 'src')
+            ], 'src', index=index)
             
             # Extract social links
             social_links = SocialLinks()
-            for link in container.find_all('a', href=True):
-                href = link.get('href', '')
+            for anchor in index.anchors_within(container):
+                href = anchor.href
                 if 'linkedin.com' in href:
                     social_links.linkedin = href
                 elif 'twitter.com' in href or 'x.com' in href:
@@ -552,7 +557,7 @@ class SiteSpecificExtractor:
         
         return None
     
-    def is_company_team_page(self, soup: BeautifulSoup, url: str) -> bool:
+    def is_company_team_page(self, soup: BeautifulSoup, url: str, index: ElementIndex) -> bool:
         """Check if this is likely a company team/about page"""
         # Look for team-related content
         team_indicators = [
@@ -560,7 +565,7 @@ class SiteSpecificExtractor:
             'employees', 'staff', 'members', 'people'
         ]
         
-        page_text = soup.get_text().lower()
+        page_text = index.text.lower()
         url_lower = url.lower()
         
         # Check URL and page content for team indicators
@@ -575,11 +580,12 @@ class SiteSpecificExtractor:
         
         return False
     
-    def extract_text(self, soup: BeautifulSoup, selectors: List[str]) -> Optional[str]:
+    def extract_text(self, soup: BeautifulSoup, selectors: List[str],
+                     index: Optional[ElementIndex] = None) -> Optional[str]:
         """Extract text content using multiple selectors"""
         for selector in selectors:
             try:
-                element = soup.select_one(selector)
+                element = index.select_one(selector, within=soup) if index else soup.select_one(selector)
                 if element:
                     text = element.get_text(strip=True)
                     if text and len(text) > 2:
@@ -588,11 +594,12 @@ class SiteSpecificExtractor:
                 continue
         return None
     
-    def extract_attribute(self, soup: BeautifulSoup, selectors: List[str], attr: str) -> Optional[str]:
+    def extract_attribute(self, soup: BeautifulSoup, selectors: List[str], attr: str,
+                          index: Optional[ElementIndex] = None) -> Optional[str]:
         """Extract attribute value using multiple selectors"""
         for selector in selectors:
             try:
-                element = soup.select_one(selector)
+                element = index.select_one(selector, within=soup) if index else soup.select_one(selector)
                 if element:
                     value = element.get(attr)
                     if value:
@@ -0,0 +1,124 @@
+import asyncio
+import time
+from typing import Dict, Any, Optional
+
+import httpx
+
+from url_utils import canonical_host
+
+# HTTP/2 needs the optional 'h2' package (pip install httpx[http2])
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+class HTTPClientPool:
+    """Service-lifetime pooled httpx client with global and per-host connection limits"""
+
+    def __init__(self, max_connections: int = 100, max_keepalive_connections: int = 20,
+                 max_connections_per_host: int = 6, keepalive_expiry: float = 30.0,
+                 http2: bool = True):
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2 and HTTP2_AVAILABLE
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._host_active: Dict[str, int] = {}
+        self._started_at: Optional[float] = None
+
+        self.requests_total = 0
+        self.errors_total = 0
+        self.in_flight = 0
+
+    async def start(self):
+        """Open the shared client (called from the FastAPI lifespan)"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive_connections,
+                    keepalive_expiry=self.keepalive_expiry
+                ),
+                http2=self.http2
+            )
+            self._started_at = time.time()
+            print(f"✅ HTTP client pool started (http2={'on' if self.http2 else 'off'}, "
+                  f"max_connections={self.max_connections}, per_host={self.max_connections_per_host})")
+
+    async def close(self):
+        """Close the shared client and drop all pooled connections"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            print("✅ HTTP client pool closed")
+
+    async def get_client(self) -> httpx.AsyncClient:
+        """Return the shared client, opening it lazily when used outside the lifespan"""
+        if self._client is None:
+            await self.start()
+        return self._client
+
+    async def get(self, url: str, headers: Optional[Dict[str, str]] = None,
+                  timeout: float = 30.0, follow_redirects: bool = False) -> httpx.Response:
+        """GET a URL through the pool, honouring the per-host connection cap"""
+        client = await self.get_client()
+        # Aliases (twitter.com / x.com) share one per-host budget
+        host = canonical_host(url)
+
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_connections_per_host)
+            self._host_semaphores[host] = semaphore
+
+        self._host_active[host] = self._host_active.get(host, 0) + 1
+        try:
+            async with semaphore:
+                self.requests_total += 1
+                self.in_flight += 1
+                try:
+                    return await client.get(
+                        url,
+                        headers=headers,
+                        timeout=timeout,
+                        follow_redirects=follow_redirects
+                    )
+                except Exception:
+                    self.errors_total += 1
+                    raise
+                finally:
+                    self.in_flight -= 1
+        finally:
+            # Forget idle hosts so the semaphore map doesn't grow without bound
+            self._host_active[host] -= 1
+            if self._host_active[host] == 0:
+                del self._host_active[host]
+                del self._host_semaphores[host]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get connection pool statistics"""
+        stats = {
+            "open": self._client is not None,
+            "http2": self.http2,
+            "max_connections": self.max_connections,
+            "max_keepalive_connections": self.max_keepalive_connections,
+            "max_connections_per_host": self.max_connections_per_host,
+            "uptime_seconds": round(time.time() - self._started_at, 1) if self._client and self._started_at else 0,
+            "requests_total": self.requests_total,
+            "errors_total": self.errors_total,
+            "in_flight": self.in_flight,
+            "active_hosts": dict(self._host_active),
+        }
+
+        # httpx doesn't expose the underlying httpcore pool publicly, so report it best-effort
+        transport = getattr(self._client, '_transport', None)
+        pool = getattr(transport, '_pool', None)
+        connections = getattr(pool, 'connections', None)
+        if connections is not None:
+            stats["connections_open"] = len(connections)
+            stats["connections_idle"] = sum(1 for conn in connections if conn.is_idle())
+
+        return stats
@@ -3,12 +3,13 @@ import httpx
 import time
 import random
 from typing import Optional, Dict, Any, List
-from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
 import json
 import os
 from datetime import datetime, timedelta
 
+from extractors.document import parse_html
+
 class ImprovedLinkedInScraper:
     def __init__(self):
         self.session_cookies = {}
@@ -267,7 +268,7 @@ class ImprovedLinkedInScraper:
         if not html or len(html) < 1000:
             return False
             
-        soup = BeautifulSoup(html, 'html.parser')
+        soup = parse_html(html)
         
         # Look for profile indicators
         profile_indicators = [
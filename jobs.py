@@ -0,0 +1,133 @@
+import asyncio
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from models import Profile, ScrapingSession
+
+class QueueFullError(Exception):
+    """Raised when the job queue is at capacity and a new job can't be accepted"""
+    pass
+
+class JobManager:
+    """Runs scrapes on a fixed pool of background workers fed by a bounded queue (state is per process)"""
+
+    def __init__(self, scrape: Callable[[str, int], Awaitable[List[Profile]]],
+                 workers: int = 4, max_queue: int = 100,
+                 retention_seconds: float = 3600, max_jobs: int = 1000):
+        self.scrape = scrape
+        self.workers = workers
+        self.max_queue = max_queue
+        self.retention_seconds = retention_seconds
+        self.max_jobs = max_jobs
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_tasks: List[asyncio.Task] = []
+        # job id -> session, oldest first
+        self._jobs: "OrderedDict[str, ScrapingSession]" = OrderedDict()
+
+        self.submitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+
+    async def start(self):
+        """Start the worker tasks (called from the FastAPI lifespan)"""
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._worker_tasks = [
+                asyncio.create_task(self._worker(), name=f"job-worker-{i}")
+                for i in range(self.workers)
+            ]
+            print(f"✅ Job workers started (workers={self.workers}, max_queue={self.max_queue})")
+
+    async def close(self):
+        """Stop the workers; queued and running jobs are abandoned"""
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        self._queue = None
+
+    async def submit(self, url: str, max_profiles: int = 10, user_agent: Optional[str] = None) -> ScrapingSession:
+        """Queue a scrape and return its pending job, or raise QueueFullError"""
+        await self.start()
+        self._prune()
+
+        job = ScrapingSession(url=url, max_profiles=max_profiles, user_agent=user_agent)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise QueueFullError(f"Job queue is full ({self.max_queue} jobs waiting)")
+
+        self._jobs[job.id] = job
+        self.submitted += 1
+        return job
+
+    def get(self, job_id: str) -> Optional[ScrapingSession]:
+        """Look up a job by id (finished jobs are kept for the retention period)"""
+        self._prune()
+        return self._jobs.get(job_id)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get job queue statistics"""
+        statuses: Dict[str, int] = {}
+        for job in self._jobs.values():
+            statuses[job.status] = statuses.get(job.status, 0) + 1
+        return {
+            "workers": len(self._worker_tasks),
+            "queued": self._queue.qsize() if self._queue else 0,
+            "max_queue": self.max_queue,
+            "stored_jobs": len(self._jobs),
+            "statuses": statuses,
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: ScrapingSession):
+        job.status = "processing"
+        job.started_at = datetime.now()
+        start_time = time.time()
+        try:
+            profiles = await self.scrape(job.url, job.max_profiles)
+            job.profiles = profiles
+            job.profiles_found = len(profiles)
+            job.strategies = list(dict.fromkeys(
+                profile.extraction_strategy for profile in profiles if profile.extraction_strategy
+            ))
+            job.status = "completed"
+            self.completed += 1
+        except Exception as e:
+            print(f"❌ Job {job.id} failed for {job.url}: {e}")
+            job.status = "failed"
+            job.error = str(e)
+            self.failed += 1
+        finally:
+            job.processing_time = round(time.time() - start_time, 2)
+            job.completed_at = datetime.now()
+
+    def _prune(self):
+        """Drop finished jobs past the retention period, then the oldest finished ones over max_jobs"""
+        now = datetime.now()
+        finished = [
+            job_id for job_id, job in self._jobs.items()
+            if job.completed_at is not None
+        ]
+        overflow = len(self._jobs) - self.max_jobs
+        for job_id in finished:
+            job = self._jobs[job_id]
+            if overflow > 0 or (now - job.completed_at).total_seconds() > self.retention_seconds:
+                del self._jobs[job_id]
+                overflow -= 1
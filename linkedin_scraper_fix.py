@@ -3,9 +3,10 @@ import httpx
 import time
 import random
 from typing import Optional, Dict, Any
-from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
 
+from extractors.document import parse_html
+
 class LinkedInScraperFix:
     def __init__(self):
         self.session_cookies = {}
@@ -194,7 +195,7 @@ class LinkedInScraperFix:
     
     def check_profile_content(self, html: str) -> bool:
         """Check if HTML contains actual profile content"""
-        soup = BeautifulSoup(html, 'html.parser')
+        soup = parse_html(html)
         
         # Look for profile indicators
         profile_indicators = [
@@ -228,7 +229,7 @@ class LinkedInScraperFix:
     
     def is_login_page(self, html: str) -> bool:
         """Check if page is a login/sign-in page"""
-        soup = BeautifulSoup(html, 'html.parser')
+        soup = parse_html(html)
         text = soup.get_text().lower()
         
         login_indicators = [
@@ -1,23 +1,37 @@
-from fastapi import FastAPI, HTTPException, Depends, Request
+from fastapi import FastAPI, HTTPException, Depends, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+from contextlib import asynccontextmanager
+import json
 import time
 import os
 from dotenv import load_dotenv
-from typing import List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 import uvicorn
 
-from models import Profile, ScrapingRequest, ScrapingResponse, ScrapingMetadata
-from scraping_service import ProfileScrapingService
+from models import (
+    Profile, ScrapingRequest, ScrapingResponse, ScrapingMetadata, ValidationResponse,
+    BatchScrapingRequest, BatchScrapingResponse, ScrapingSession, JobSubmittedResponse
+)
+from scraping_service import ProfileScrapingService, InvalidURLError
+from jobs import QueueFullError
 from rate_limiter import RateLimiter
 
 # Load environment variables
 load_dotenv()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Keep pooled HTTP connections open for the lifetime of the app
+    await scraping_service.startup()
+    yield
+    await scraping_service.shutdown()
+
 app = FastAPI(
     title="User Profile Scraper API",
     description="AI-powered web scraping service for extracting user profiles",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -32,11 +46,37 @@ app.add_middleware(
 # Initialize services
 scraping_service = ProfileScrapingService()
 rate_limiter = RateLimiter(max_requests=10, window_seconds=60)
+# Job status polls are cheap lookups; they get their own limit so polling never locks a client out of the API
+job_poll_limiter = RateLimiter(max_requests=120, window_seconds=60)
+
+STREAM_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+def format_stream_event(event: Dict[str, Any], stream_format: str) -> str:
+    """Encode one event as an NDJSON line or a Server-Sent Event"""
+    data = json.dumps(event)
+    if stream_format == "sse":
+        return f"event: {event['event']}\ndata: {data}\n\n"
+    return data + "\n"
+
+def streaming_response(events: AsyncIterator[Dict[str, Any]], stream_format: str) -> StreamingResponse:
+    """Stream events to the client as they are produced"""
+    async def body():
+        async for event in events:
+            yield format_stream_event(event, stream_format)
+    
+    # Stop reverse proxies from buffering the stream
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(body(), media_type=STREAM_MEDIA_TYPES[stream_format], headers=headers)
 
 @app.middleware("http")
 async def rate_limit_middleware(request: Request, call_next):
     client_ip = request.client.host
-    if not rate_limiter.is_allowed(client_ip):
+    is_job_poll = request.method == "GET" and request.url.path.startswith("/api/jobs/")
+    limiter = job_poll_limiter if is_job_poll else rate_limiter
+    if not limiter.is_allowed(client_ip):
         return JSONResponse(
             status_code=429,
             content={"error": "Rate limit exceeded. Please try again later."}
@@ -57,16 +97,23 @@ async def health_check():
         "service": "profile-scraper"
     }
 
-@app.post("/api/validate-url")
+@app.get("/api/stats")
+async def get_stats():
+    """Get connection pool and cache statistics"""
+    return scraping_service.get_stats()
+
+@app.post("/api/validate-url", response_model=ValidationResponse)
 async def validate_url(request: ScrapingRequest):
     """Validate URL format and check if it's accessible"""
     try:
-        is_valid = await scraping_service.validate_url(request.url)
-        return {
-            "valid": is_valid,
-            "url": request.url,
-            "message": "URL is valid and accessible" if is_valid else "URL is invalid or not accessible"
-        }
+        page = await scraping_service.validate_page(request.url)
+        return ValidationResponse(
+            valid=page.valid,
+            url=str(request.url),
+            message="URL is valid and accessible" if page.valid else "URL is invalid or not accessible",
+            status_code=page.status_code,
+            content_type=page.content_type or None
+        )
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -77,20 +124,16 @@ async def scrape_profiles(request: ScrapingRequest):
         print(f"🔍 API: Starting scrape for URL: {request.url}")
         start_time = time.time()
         
-        # Validate URL first
-        print(f"🔍 API: Validating URL...")
-        url_str = str(request.url)
-        if not await scraping_service.validate_url(url_str):
-            print(f"❌ API: URL validation failed")
-            raise HTTPException(status_code=400, detail="Invalid or inaccessible URL")
-        print(f"✅ API: URL validation passed")
-        
-        # Scrape profiles
+        # Scrape profiles (the service validates the URL from the same fetch)
         print(f"🔍 API: Calling scraping service...")
         # Convert HttpUrl to string to avoid type issues
         url_str = str(request.url)
         print(f"🔍 API: URL converted to string: {url_str}")
-        profiles = await scraping_service.scrape_profiles(url_str)
+        try:
+            profiles = await scraping_service.scrape_profiles(url_str, max_profiles=request.max_profiles)
+        except InvalidURLError:
+            print(f"❌ API: URL validation failed")
+            raise HTTPException(status_code=400, detail="Invalid or inaccessible URL")
         print(f"🎯 API: Scraping service returned: {len(profiles)} profiles")
         
         # Debug: Show profile details
@@ -122,6 +165,106 @@ async def scrape_profiles(request: ScrapingRequest):
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Scraping failed: {str(e)}")
 
+@app.post("/api/scrape/stream")
+async def scrape_profiles_stream(request: ScrapingRequest,
+                                 stream_format: str = Query("ndjson", alias="format", pattern="^(ndjson|sse)$")):
+    """Stream profiles as each extraction strategy finishes (NDJSON lines or Server-Sent Events)"""
+    print(f"🔍 API: Starting streaming scrape for URL: {request.url}")
+    events = scraping_service.scrape_profiles_stream(str(request.url), max_profiles=request.max_profiles)
+    
+    # Pull the first event before responding so an invalid URL still gets a proper 400
+    try:
+        first_event = await events.__anext__()
+    except InvalidURLError:
+        print(f"❌ API: URL validation failed")
+        raise HTTPException(status_code=400, detail="Invalid or inaccessible URL")
+    
+    async def all_events():
+        yield first_event
+        async for event in events:
+            yield event
+    
+    return streaming_response(all_events(), stream_format)
+
+@app.post("/api/scrape/batch", response_model=BatchScrapingResponse)
+async def scrape_batch(request: BatchScrapingRequest):
+    """Scrape a list of URLs concurrently, returning per-URL results and errors"""
+    print(f"🔍 API: Starting batch scrape for {len(request.urls)} URLs")
+    start_time = time.time()
+    
+    results = await scraping_service.scrape_batch(
+        [str(url) for url in request.urls],
+        max_profiles=request.max_profiles,
+        concurrency=request.concurrency
+    )
+    succeeded = sum(1 for result in results if result.success)
+    
+    print(f"📤 API: Batch finished, {succeeded}/{len(results)} URLs succeeded")
+    return BatchScrapingResponse(
+        success=succeeded > 0,
+        results=results,
+        total_urls=len(results),
+        succeeded=succeeded,
+        failed=len(results) - succeeded,
+        processing_time=round(time.time() - start_time, 2)
+    )
+
+@app.post("/api/scrape/batch/stream")
+async def scrape_batch_stream(request: BatchScrapingRequest,
+                              stream_format: str = Query("ndjson", alias="format", pattern="^(ndjson|sse)$")):
+    """Stream per-URL batch results in completion order, followed by a summary event"""
+    print(f"🔍 API: Starting streaming batch scrape for {len(request.urls)} URLs")
+    
+    async def events():
+        start_time = time.time()
+        succeeded = 0
+        total = 0
+        async for result in scraping_service.scrape_batch_stream(
+            [str(url) for url in request.urls],
+            max_profiles=request.max_profiles,
+            concurrency=request.concurrency
+        ):
+            total += 1
+            succeeded += result.success
+            yield {"event": "result", **result.model_dump()}
+        
+        print(f"📤 API: Batch stream finished, {succeeded}/{total} URLs succeeded")
+        yield {
+            "event": "done",
+            "success": succeeded > 0,
+            "total_urls": total,
+            "succeeded": succeeded,
+            "failed": total - succeeded,
+            "processing_time": round(time.time() - start_time, 2)
+        }
+    
+    return streaming_response(events(), stream_format)
+
+@app.post("/api/jobs", response_model=JobSubmittedResponse, status_code=202)
+async def submit_job(request: ScrapingRequest, http_request: Request):
+    """Queue a scrape to run in the background; poll GET /api/jobs/{job_id} for the result"""
+    try:
+        job = await scraping_service.jobs.submit(
+            str(request.url),
+            max_profiles=request.max_profiles,
+            user_agent=http_request.headers.get("user-agent")
+        )
+    except QueueFullError as e:
+        print(f"⚠️  API: {e}")
+        raise HTTPException(status_code=429, detail="Job queue is full. Please try again later.",
+                            headers={"Retry-After": "5"})
+    
+    print(f"🔍 API: Queued job {job.id} for URL: {job.url}")
+    return JobSubmittedResponse(job_id=job.id, status=job.status, status_url=f"/api/jobs/{job.id}")
+
+@app.get("/api/jobs/{job_id}", response_model=ScrapingSession)
+async def get_job(job_id: str):
+    """Get the status of a queued scrape, including its profiles once completed"""
+    job = scraping_service.jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
 @app.get("/api/profiles")
 async def get_cached_profiles():
     """Get recently scraped profiles from cache"""
@@ -132,6 +275,16 @@ async def get_cached_profiles():
         "count": len(profiles)
     }
 
+@app.get("/api/people")
+async def get_people():
+    """Get people merged across every scraped URL (same email, social link, or name + company/title)"""
+    people = scraping_service.get_people()
+    return {
+        "success": True,
+        "people": people,
+        "count": len(people)
+    }
+
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
@@ -27,12 +27,32 @@ class Profile(BaseModel):
     extraction_strategy: str = "unknown"
     raw_data: Optional[Dict[str, Any]] = None
 
+class Person(BaseModel):
+    id: str
+    name: Optional[str] = None
+    title: Optional[str] = None
+    email: Optional[str] = None
+    phone: Optional[str] = None
+    image: Optional[str] = None
+    bio: Optional[str] = None
+    company: Optional[str] = None
+    location: Optional[str] = None
+    social_links: SocialLinks = Field(default_factory=SocialLinks)
+    sources: List[str] = Field(default_factory=list)
+    profile_ids: List[str] = Field(default_factory=list)
+    confidence: float = 0.0
+
 class ScrapingRequest(BaseModel):
     url: HttpUrl
     options: Optional[Dict[str, Any]] = Field(default_factory=dict)
     max_profiles: Optional[int] = Field(default=10, ge=1, le=100)
     timeout: Optional[int] = Field(default=30, ge=10, le=120)
 
+class BatchScrapingRequest(BaseModel):
+    urls: List[HttpUrl] = Field(min_length=1, max_length=100)
+    max_profiles: Optional[int] = Field(default=10, ge=1, le=100)
+    concurrency: Optional[int] = Field(default=None, ge=1, le=50, description="Max URLs scraped at once")
+
 class ScrapingMetadata(BaseModel):
     url: str
     scraped_at: float
@@ -47,6 +67,21 @@ class ScrapingResponse(BaseModel):
     metadata: ScrapingMetadata
     error: Optional[str] = None
 
+class BatchItemResult(BaseModel):
+    url: str
+    success: bool
+    profiles: List[Profile] = Field(default_factory=list)
+    processing_time: float = 0.0
+    error: Optional[str] = None
+
+class BatchScrapingResponse(BaseModel):
+    success: bool
+    results: List[BatchItemResult]
+    total_urls: int
+    succeeded: int
+    failed: int
+    processing_time: float
+
 class ValidationResponse(BaseModel):
     valid: bool
     url: str
@@ -54,6 +89,14 @@ class ValidationResponse(BaseModel):
     status_code: Optional[int] = None
     content_type: Optional[str] = None
 
+class FetchResult(BaseModel):
+    url: str
+    status_code: Optional[int] = None
+    content_type: str = ""
+    html: Optional[str] = None
+    valid: bool = False
+    error: Optional[str] = None
+
 class CacheEntry(BaseModel):
     url: str
     profiles: List[Profile]
@@ -64,10 +107,19 @@ class CacheEntry(BaseModel):
 class ScrapingSession(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     url: str
-    user_agent: str
-    profiles_found: int
-    processing_time: float
-    strategies: List[str]
+    user_agent: Optional[str] = None
+    max_profiles: int = 10
+    profiles_found: int = 0
+    processing_time: float = 0.0
+    strategies: List[str] = Field(default_factory=list)
+    profiles: List[Profile] = Field(default_factory=list)
     created_at: datetime = Field(default_factory=datetime.now)
-    status: str = "completed"  # pending, processing, completed, failed
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    status: str = "pending"  # pending, processing, completed, failed
     error: Optional[str] = None
+
+class JobSubmittedResponse(BaseModel):
+    job_id: str
+    status: str
+    status_url: str
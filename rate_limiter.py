@@ -1,6 +1,7 @@
+import asyncio
 import time
-from collections import defaultdict
-from typing import Dict, Tuple
+from collections import defaultdict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
 
 class RateLimiter:
     def __init__(self, max_requests: int = 10, window_seconds: int = 60):
@@ -48,3 +49,124 @@ class RateLimiter:
     def reset_client(self, client_ip: str):
         """Reset rate limit for a specific client"""
         self.requests[client_ip].clear()
+
+def estimate_tokens(text: str) -> int:
+    """Rough model token count (about 4 characters per token) without a count_tokens round trip"""
+    return len(text) // 4 + 1
+
+class ModelRateLimiter:
+    """Shared async token buckets for model calls, in requests/min and tokens/min (0 = unlimited)"""
+
+    def __init__(self, requests_per_minute: float = 15, tokens_per_minute: float = 1_000_000,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], Awaitable[None]] = asyncio.sleep):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        # Injectable so tests can drive time without waiting
+        self.clock = clock
+        self.sleep = sleep
+        # Buckets start full, so a quiet service calls the model immediately
+        self._request_tokens = float(requests_per_minute)
+        self._model_tokens = float(tokens_per_minute)
+        self._updated = self.clock()
+        self._paused_until = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+
+        self.acquired = 0
+        self.throttled = 0
+        self.pauses = 0
+        self.wait_seconds_total = 0.0
+
+    async def acquire(self, tokens: int = 1):
+        """Wait until one request and `tokens` model tokens are available, then take them"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        # One waiter at a time keeps callers in FIFO order
+        async with self._lock:
+            started = self.clock()
+            if self.tokens_per_minute:
+                # A prompt bigger than a whole minute of quota would otherwise never fit
+                tokens = min(tokens, self.tokens_per_minute)
+            while True:
+                wait = self._wait_seconds(tokens)
+                if wait <= 0:
+                    break
+                self.throttled += 1
+                await self.sleep(wait)
+
+            if self.requests_per_minute:
+                self._request_tokens -= 1
+            if self.tokens_per_minute:
+                self._model_tokens -= tokens
+            self.acquired += 1
+            self.wait_seconds_total += self.clock() - started
+
+    def pause(self, seconds: float):
+        """Hold every caller back after the model reported a rate limit"""
+        self._paused_until = max(self._paused_until, self.clock() + seconds)
+        self.pauses += 1
+
+    def _wait_seconds(self, tokens: int) -> float:
+        now = self.clock()
+        elapsed = now - self._updated
+        self._updated = now
+        if self.requests_per_minute:
+            self._request_tokens = min(self.requests_per_minute,
+                                       self._request_tokens + elapsed * self.requests_per_minute / 60)
+        if self.tokens_per_minute:
+            self._model_tokens = min(self.tokens_per_minute,
+                                     self._model_tokens + elapsed * self.tokens_per_minute / 60)
+
+        wait = self._paused_until - now
+        if self.requests_per_minute and self._request_tokens < 1:
+            wait = max(wait, (1 - self._request_tokens) * 60 / self.requests_per_minute)
+        if self.tokens_per_minute and self._model_tokens < tokens:
+            wait = max(wait, (tokens - self._model_tokens) * 60 / self.tokens_per_minute)
+        return wait
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "requests_per_minute": self.requests_per_minute,
+            "tokens_per_minute": self.tokens_per_minute,
+            "acquired": self.acquired,
+            "throttled": self.throttled,
+            "pauses": self.pauses,
+            "avg_wait_ms": round(self.wait_seconds_total / self.acquired * 1000, 2) if self.acquired else 0.0,
+        }
+
+class RetryBudget:
+    """Caps retries at a fraction of recent calls so an outage can't multiply model traffic"""
+
+    def __init__(self, ratio: float = 0.2, min_retries: int = 5, window_seconds: float = 60,
+                 clock: Callable[[], float] = time.monotonic):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window_seconds = window_seconds
+        self.clock = clock
+        self._calls: Deque[float] = deque()
+        self._retries: Deque[float] = deque()
+        self.exhausted = 0
+
+    def record_call(self):
+        self._calls.append(self.clock())
+
+    def can_retry(self) -> bool:
+        """Take one retry from the budget if there is one left"""
+        now = self.clock()
+        for events in (self._calls, self._retries):
+            while events and now - events[0] > self.window_seconds:
+                events.popleft()
+
+        if len(self._retries) >= self.min_retries + self.ratio * len(self._calls):
+            self.exhausted += 1
+            return False
+        self._retries.append(now)
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "ratio": self.ratio,
+            "calls_in_window": len(self._calls),
+            "retries_in_window": len(self._retries),
+            "exhausted": self.exhausted,
+        }
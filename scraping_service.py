@@ -1,9 +1,7 @@
 import asyncio
-import httpx
 import time
 import random
-from typing import List, Optional, Dict, Any
-from bs4 import BeautifulSoup
+from typing import List, Optional, Dict, Any, AsyncIterator, Awaitable, Callable, Tuple
 import re
 import json
 import os
@@ -13,20 +11,106 @@ import google.generativeai as genai
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 
-from models import Profile, SocialLinks, CacheEntry
+from models import Profile, SocialLinks, CacheEntry, FetchResult, BatchItemResult, ScrapingMetadata, Person
 from extractors.css_extractor import CSSProfileExtractor
 from extractors.ai_extractor import AIProfileExtractor
 from extractors.site_specific import SiteSpecificExtractor
+from extractors.document import ParsedDocument, get_parser_backend, parse_html
+from extractors.process_worker import extract_in_process, deserialize_profiles
+from http_client import HTTPClientPool
+from cache import AIResponseCache, LRUCache, SQLiteCache
+from rate_limiter import ModelRateLimiter, RetryBudget
+from singleflight import SingleFlight
+from jobs import JobManager
+from worker_pool import ExtractionPool, CPUBudget, CPUBudgetExceeded
+from url_utils import canonicalize_url, canonical_host
+from dedup import remove_duplicates
+from entity_index import EntityIndex
+
+# Strategies are merged in this order regardless of which finished first
+STRATEGY_PRIORITY = ["site_specific", "css_selectors", "ai_extraction"]
+
+# Marker yielded by iter_scrape after the per-strategy results
+FINAL_RESULT = "final"
+
+# Marker for AI profiles yielded while the model is still writing its answer (previews, not results)
+AI_PREVIEW = "ai_preview"
+
+class InvalidURLError(Exception):
+    """Raised when a URL is not accessible or doesn't serve HTML content"""
+    pass
 
 class ProfileScrapingService:
     def __init__(self):
-        self.cache: Dict[str, CacheEntry] = {}
-        self.cache_ttl_hours = 24
+        self.cache_ttl_hours = float(os.getenv('CACHE_TTL_HOURS', '24'))
+        self.cache = self.create_cache()
+        self.inflight = SingleFlight()
+        
+        # Cross-URL person index, fed incrementally as results are cached
+        self.entity_index = EntityIndex(max_profiles=int(os.getenv('ENTITY_INDEX_MAX_PROFILES', '50000')))
+        # Background rebuild in progress, and the profiles cached since it took its snapshot
+        self.entity_rebuild: Optional[asyncio.Future] = None
+        self.entity_backlog: List[Profile] = []
+        
+        # Batch scraping limits: total URLs in flight, and per target host for politeness
+        self.batch_concurrency = int(os.getenv('BATCH_CONCURRENCY', '10'))
+        self.batch_per_host_concurrency = int(os.getenv('BATCH_PER_HOST_CONCURRENCY', '2'))
+        
+        # Background job queue: scrapes submitted via the job API run on these workers
+        self.jobs = JobManager(
+            self.scrape_profiles,
+            workers=int(os.getenv('JOB_WORKERS', '4')),
+            max_queue=int(os.getenv('JOB_QUEUE_SIZE', '100')),
+            retention_seconds=float(os.getenv('JOB_RETENTION_MINUTES', '60')) * 60
+        )
         self.user_agent = UserAgent()
         
+        # Shared connection pool, opened/closed by the FastAPI lifespan
+        self.http_pool = HTTPClientPool(
+            max_connections=int(os.getenv('HTTP_MAX_CONNECTIONS', '100')),
+            max_keepalive_connections=int(os.getenv('HTTP_MAX_KEEPALIVE_CONNECTIONS', '20')),
+            max_connections_per_host=int(os.getenv('HTTP_MAX_CONNECTIONS_PER_HOST', '6')),
+            http2=os.getenv('HTTP2_ENABLED', 'true').lower() == 'true'
+        )
+        
+        # Extraction orchestration: 'sequential' or 'concurrent'
+        self.extraction_mode = os.getenv('EXTRACTION_MODE', 'sequential').lower()
+        self.ai_skip_confidence = float(os.getenv('AI_SKIP_CONFIDENCE', '0.9'))
+        # Scrapes don't depend on the caller's max_profiles, so one cached result serves every request
+        self.ai_skip_profile_count = int(os.getenv('AI_SKIP_PROFILE_COUNT', '10'))
+        self.ai_max_content_chars = int(os.getenv('AI_MAX_CONTENT_CHARS', '8000'))
+        self.ai_max_chunks = int(os.getenv('AI_MAX_CHUNKS', '1'))
+        self.ai_cache = self.create_ai_cache()
+        # Model quota shared by every AI call (0 disables a limit)
+        self.model_limiter = ModelRateLimiter(
+            requests_per_minute=float(os.getenv('AI_REQUESTS_PER_MINUTE', '15')),
+            tokens_per_minute=float(os.getenv('AI_TOKENS_PER_MINUTE', '1000000'))
+        )
+        self.ai_retry_budget = RetryBudget(ratio=float(os.getenv('AI_RETRY_BUDGET_RATIO', '0.2')))
+        # Opt-in: small pages arriving together share one model request
+        self.ai_batch_enabled = os.getenv('AI_BATCH_ENABLED', 'false').lower() == 'true'
+        self.ai_batch_max_wait_seconds = float(os.getenv('AI_BATCH_MAX_WAIT_MS', '200')) / 1000
+        self.ai_batch_max_tokens = int(os.getenv('AI_BATCH_MAX_TOKENS', '6000'))
+        self.ai_batch_max_pages = int(os.getenv('AI_BATCH_MAX_PAGES', '8'))
+        
+        # Parsing and CPU-bound extraction run here so large pages don't stall the event loop
+        # (EXTRACTION_POOL: 'thread', or 'process' to use every core for parsing and extraction)
+        self.extraction_pool = ExtractionPool(
+            kind=os.getenv('EXTRACTION_POOL', 'thread').lower(),
+            workers=int(os.getenv('EXTRACTION_WORKERS', '4'))
+        )
+        self.cpu_budget_seconds = float(os.getenv('EXTRACTION_CPU_BUDGET_SECONDS', '10'))
+        
+        # HTML parser backend (HTML_PARSER_BACKEND: html.parser or lxml)
+        print(f"✅ HTML parser backend: {get_parser_backend().name}")
+        
         # Initialize extractors
         self.css_extractor = CSSProfileExtractor()
-        self.ai_extractor = AIProfileExtractor()
+        self.ai_extractor = AIProfileExtractor(max_content_chars=self.ai_max_content_chars,
+                                               max_chunks=self.ai_max_chunks,
+                                               response_cache=self.ai_cache,
+                                               rate_limiter=self.model_limiter,
+                                               retry_budget=self.ai_retry_budget)
         self.site_extractor = SiteSpecificExtractor()
         
         # Configure AI (Gemini 2.0 Flash)
@@ -43,7 +127,18 @@ class ProfileScrapingService:
                 genai.configure(api_key=api_key)
                 # Initialize the AI extractor with Gemini 2.0 Flash model
                 gemini_model = genai.GenerativeModel('gemini-2.0-flash')
-                self.ai_extractor = AIProfileExtractor(gemini_model)
+                self.ai_extractor = AIProfileExtractor(
+                    gemini_model,
+                    max_content_chars=self.ai_max_content_chars,
+                    max_chunks=self.ai_max_chunks,
+                    response_cache=self.ai_cache,
+                    rate_limiter=self.model_limiter,
+                    retry_budget=self.ai_retry_budget
+                )
+                if self.ai_batch_enabled:
+                    self.ai_extractor.enable_batching(self.ai_batch_max_wait_seconds,
+                                                      self.ai_batch_max_tokens, self.ai_batch_max_pages)
+                    print(f"✅ AI batching enabled (up to {self.ai_batch_max_pages} pages per request)")
                 print("✅ AI extraction enabled with Gemini 2.0 Flash")
                 self.ai_enabled = True
             except Exception as e:
@@ -55,38 +150,81 @@ class ProfileScrapingService:
             print("⚠️  AI extraction will be disabled")
             self.ai_enabled = False
     
+    def create_cache(self):
+        """Create the scrape cache: per-process memory (default) or SQLite shared by all workers"""
+        max_entries = int(os.getenv('CACHE_MAX_ENTRIES', '1000'))
+        max_bytes = int(float(os.getenv('CACHE_MAX_MB', '64')) * 1024 * 1024)
+        
+        if os.getenv('CACHE_BACKEND', 'memory').lower() == 'sqlite':
+            path = os.getenv('CACHE_DB_PATH', 'scrape_cache.db')
+            print(f"✅ Using SQLite scrape cache at {path}")
+            return SQLiteCache(
+                path,
+                serialize=lambda entry: entry.model_dump_json(),
+                deserialize=CacheEntry.model_validate_json,
+                max_entries=max_entries,
+                max_bytes=max_bytes
+            )
+        
+        return LRUCache(
+            max_entries=max_entries,
+            max_bytes=max_bytes,
+            sizeof=lambda entry: len(entry.model_dump_json())
+        )
+    
+    def create_ai_cache(self) -> AIResponseCache:
+        """Create the AI response cache: memory in front of a SQLite file (AI_CACHE_DB_PATH='' keeps it in memory)"""
+        path = os.getenv('AI_CACHE_DB_PATH', 'ai_cache.db')
+        if path:
+            print(f"✅ Using AI response cache at {path}")
+        return AIResponseCache(
+            ttl_seconds=float(os.getenv('AI_CACHE_TTL_HOURS', '168')) * 3600,
+            max_entries=int(os.getenv('AI_CACHE_MAX_ENTRIES', '5000')),
+            max_bytes=int(float(os.getenv('AI_CACHE_MAX_MB', '32')) * 1024 * 1024),
+            path=path or None
+        )
+    
+    async def startup(self):
+        """Open long-lived resources (HTTP connection pool, job workers)"""
+        await self.http_pool.start()
+        await self.jobs.start()
+        # A persistent cache may already hold results from earlier runs
+        await self.rebuild_entity_index()
+    
+    async def shutdown(self):
+        """Release long-lived resources"""
+        await self.jobs.close()
+        await self.http_pool.close()
+        if self.entity_rebuild is not None:
+            await self.entity_rebuild
+        self.extraction_pool.shutdown()
+        self.cache.close()
+        self.ai_cache.close()
+    
+    def is_valid_response(self, status_code: int, content_type: str) -> bool:
+        """Derive the URL validation verdict from a fetched response"""
+        if status_code == 200:
+            # Accept any content type that contains 'html' or is text
+            content_type = content_type.lower()
+            return 'html' in content_type or 'text' in content_type
+        elif status_code in [403, 429, 401]:
+            # Some sites return these status codes but still have content
+            return True
+        elif status_code == 404:
+            # Page not found
+            return False
+        else:
+            # For other status codes, try to get content anyway
+            return True
+    
     async def validate_url(self, url) -> bool:
         """Validate if URL is accessible and returns HTML content"""
-        try:
-            # Convert Pydantic HttpUrl to string if needed
-            url_str = str(url)
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-                'Accept-Language': 'en-US,en;q=0.5',
-                'Accept-Encoding': 'gzip, deflate',
-                'Connection': 'keep-alive',
-                'Upgrade-Insecure-Requests': '1',
-            }
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(url_str, headers=headers)
-                
-                if response.status_code == 200:
-                    content_type = response.headers.get('content-type', '').lower()
-                    # Accept any content type that contains 'html' or is text
-                    return 'html' in content_type or 'text' in content_type
-                elif response.status_code in [403, 429, 401]:
-                    # Some sites return these status codes but still have content
-                    return True
-                elif response.status_code == 404:
-                    # Page not found
-                    return False
-                else:
-                    # For other status codes, try to get content anyway
-                    return True
-        except Exception as e:
-            print(f"URL validation error: {e}")
-            return False
+        page = await self.validate_page(url)
+        return page.valid
+    
+    async def validate_page(self, url) -> FetchResult:
+        """Check a URL with one direct request; scrapes validate from their own fetch instead"""
+        return await self.fetch_direct(str(url), timeout=10.0)
     
     async def scrape_profiles(self, url, max_profiles: int = 10) -> List[Profile]:
         """Main method to scrape profiles using multiple strategies"""
@@ -98,58 +236,356 @@ class ProfileScrapingService:
         if cached_result:
             return cached_result[:max_profiles]
         
-        try:
-            # Fetch HTML content
-            html_content = await self.fetch_html(url_str)
-            if not html_content:
-                return []
-            
-            # Parse HTML
-            soup = BeautifulSoup(html_content, 'html.parser')
-            
-            # Try different extraction strategies
+        profiles = await self.scrape_uncached(url_str)
+        return profiles[:max_profiles]
+    
+    async def scrape_profiles_stream(self, url, max_profiles: int = 10) -> AsyncIterator[Dict[str, Any]]:
+        """Like scrape_profiles, but yield each strategy's profiles as soon as it finishes, then a final 'done' event"""
+        url_str = str(url)
+        start_time = time.time()
+        
+        cached_result = self.get_cached_result(url_str)
+        if cached_result:
+            profiles = cached_result[:max_profiles]
+            strategies_used = []
+            yield {"event": "profiles", "strategy": "cache", "profiles": [p.model_dump() for p in profiles]}
+        else:
             profiles = []
             strategies_used = []
+            async for strategy, strategy_profiles in self.shared_scrape(url_str):
+                if strategy == FINAL_RESULT:
+                    profiles = strategy_profiles[:max_profiles]
+                    continue
+                if strategy == AI_PREVIEW:
+                    yield {
+                        "event": "profiles",
+                        "strategy": "ai_extraction",
+                        "partial": True,
+                        "profiles": [p.model_dump() for p in strategy_profiles]
+                    }
+                    continue
+                if strategy_profiles:
+                    strategies_used.append(strategy)
+                # Raw per-strategy hits are a preview; the deduplicated list comes with 'done'
+                yield {
+                    "event": "profiles",
+                    "strategy": strategy,
+                    "profiles": [p.model_dump() for p in strategy_profiles[:max_profiles]]
+                }
+        
+        metadata = ScrapingMetadata(
+            url=url_str,
+            scraped_at=time.time(),
+            processing_time=round(time.time() - start_time, 2),
+            profiles_found=len(profiles),
+            extraction_strategies_used=sorted(strategies_used, key=STRATEGY_PRIORITY.index)
+        )
+        yield {
+            "event": "done",
+            "success": True,
+            "profiles": [p.model_dump() for p in profiles],
+            "metadata": metadata.model_dump()
+        }
+    
+    def batch_tasks(self, urls: List[str], max_profiles: int = 10,
+                    concurrency: Optional[int] = None) -> List[Awaitable[BatchItemResult]]:
+        """One awaitable per URL, sharing global and per-host concurrency limits"""
+        semaphore = asyncio.Semaphore(concurrency or self.batch_concurrency)
+        host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        
+        async def scrape_one(url: str) -> BatchItemResult:
+            host = canonical_host(url)
+            if host not in host_semaphores:
+                host_semaphores[host] = asyncio.Semaphore(self.batch_per_host_concurrency)
             
+            # Wait for the host slot first so a busy host doesn't hold global slots
+            async with host_semaphores[host]:
+                async with semaphore:
+                    start_time = time.time()
+                    try:
+                        profiles = await self.scrape_profiles(url, max_profiles)
+                        return BatchItemResult(
+                            url=url,
+                            success=True,
+                            profiles=profiles,
+                            processing_time=round(time.time() - start_time, 2)
+                        )
+                    except Exception as e:
+                        print(f"❌ Batch item failed for {url}: {e}")
+                        return BatchItemResult(
+                            url=url,
+                            success=False,
+                            processing_time=round(time.time() - start_time, 2),
+                            error=str(e)
+                        )
+        
+        return [scrape_one(str(url)) for url in urls]
+    
+    async def scrape_batch(self, urls: List[str], max_profiles: int = 10,
+                           concurrency: Optional[int] = None) -> List[BatchItemResult]:
+        """Scrape many URLs with bounded concurrency, returning per-URL results in input order"""
+        return await asyncio.gather(*self.batch_tasks(urls, max_profiles, concurrency))
+    
+    async def scrape_batch_stream(self, urls: List[str], max_profiles: int = 10,
+                                  concurrency: Optional[int] = None) -> AsyncIterator[BatchItemResult]:
+        """Scrape many URLs with bounded concurrency, yielding each result as soon as it completes"""
+        tasks = [asyncio.ensure_future(task) for task in self.batch_tasks(urls, max_profiles, concurrency)]
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                yield await next_result
+        finally:
+            # The client went away mid-stream: URLs still waiting for a slot are never started, while
+            # scrapes already running finish in their shared producer and are cached for the next request
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+    
+    async def scrape_uncached(self, url_str: str) -> List[Profile]:
+        """Fetch, extract and cache profiles for a URL that missed the cache"""
+        profiles = []
+        async for strategy, strategy_profiles in self.shared_scrape(url_str):
+            if strategy == FINAL_RESULT:
+                profiles = strategy_profiles
+        return profiles
+    
+    def shared_scrape(self, url_str: str) -> AsyncIterator[Tuple[str, List[Profile]]]:
+        """iter_scrape, with concurrent requests for the same URL (after canonicalization) sharing one fetch and extraction;
+        streaming and blocking callers join the same run, and late joiners replay what it has yielded so far"""
+        return self.inflight.stream(canonicalize_url(url_str), lambda: self.iter_scrape(url_str))
+    
+    async def iter_scrape(self, url_str: str) -> AsyncIterator[Tuple[str, List[Profile]]]:
+        """Fetch and extract a URL, yielding (strategy, profiles) as each strategy finishes,
+        then (FINAL_RESULT, all deduplicated profiles), which are also cached; callers apply max_profiles"""
+        # Fetch once: the same response validates the URL and feeds the parser
+        page = await self.fetch_page(url_str)
+        if not page.valid:
+            raise InvalidURLError(f"Invalid or inaccessible URL: {url_str}")
+        
+        final_profiles = []
+        try:
+            html_content = page.html
+            if html_content:
+                # CPU seconds this scrape may spend on parsing and extraction
+                budget = CPUBudget(self.cpu_budget_seconds)
+                
+                results = {}
+                strategies = self.iter_strategies(html_content, url_str, self.ai_skip_profile_count, budget)
+                async for strategy, strategy_profiles in strategies:
+                    if strategy != AI_PREVIEW:
+                        results[strategy] = strategy_profiles
+                    yield strategy, strategy_profiles
+                
+                # Remove duplicates; the full list is cached and each request takes its own max_profiles
+                final_profiles = self.remove_duplicates(self.merge_strategy_results(results))
+                
+                # Cache the results
+                self.cache_result(url_str, final_profiles)
+            
+        except Exception as e:
+            print(f"Scraping error: {e}")
+            final_profiles = []
+        
+        yield FINAL_RESULT, final_profiles
+    
+    async def iter_strategies(self, html: str, url: str, max_profiles: int,
+                              budget: Optional[CPUBudget] = None) -> AsyncIterator[Tuple[str, List[Profile]]]:
+        """Run the extraction strategies in the configured mode, yielding each one's result as it finishes"""
+        if self.extraction_pool.kind == 'process':
+            # Parse trees can't cross the process boundary; the worker does parse + CPU extraction
+            strategies = self.extract_in_worker_process(html, url, max_profiles, budget)
+        else:
+            # Parse HTML once, off the event loop; every strategy reads the same document
+            document = await self.extraction_pool.run(ParsedDocument.from_html, html, None, url, budget=budget)
+            if self.extraction_mode == 'concurrent':
+                strategies = self.extract_concurrently(document, url, max_profiles, budget)
+            else:
+                strategies = self.extract_sequentially(document, url, max_profiles, budget)
+        
+        async for strategy, strategy_profiles in strategies:
+            yield strategy, strategy_profiles
+    
+    def merge_strategy_results(self, results: Dict[str, List[Profile]]) -> List[Profile]:
+        """Combine per-strategy results in priority order, whatever order they finished in"""
+        profiles = []
+        strategies_used = []
+        for strategy in STRATEGY_PRIORITY:
+            if results.get(strategy):
+                profiles.extend(results[strategy])
+                strategies_used.append(strategy)
+        
+        print(f"🧩 Strategies used: {', '.join(strategies_used) or 'none'}")
+        return profiles
+    
+    async def extract_sequentially(self, document: ParsedDocument, url: str, max_profiles: int,
+                                   budget: Optional[CPUBudget] = None) -> AsyncIterator[Tuple[str, List[Profile]]]:
+        """Run the extraction strategies one after another on the same document"""
+        try:
             # Strategy 1: Site-specific extraction (highest priority)
-            site_profiles = await self.site_extractor.extract(soup, url)
-            if site_profiles:
-                profiles.extend(site_profiles)
-                strategies_used.append("site_specific")
+            site_profiles = await self.extraction_pool.run(self.run_site_extractor, document, url, budget=budget)
+            yield "site_specific", site_profiles
             
             # Strategy 2: CSS selector extraction
-            css_profiles = self.css_extractor.extract(soup, url)
-            if css_profiles:
-                profiles.extend(css_profiles)
-                strategies_used.append("css_selectors")
+            css_profiles = await self.extraction_pool.run(self.css_extractor.extract, document, url, budget=budget)
+            yield "css_selectors", css_profiles
             
             # Strategy 3: AI-powered extraction (if available)
-            if self.ai_enabled and len(profiles) < max_profiles:
-                ai_profiles = await self.ai_extractor.extract(soup, url)
-                if ai_profiles:
-                    profiles.extend(ai_profiles)
-                    strategies_used.append("ai_extraction")
-            
-            # Remove duplicates and limit results
-            unique_profiles = self.remove_duplicates(profiles)
-            final_profiles = unique_profiles[:max_profiles]
-            
-            # Cache the results
-            self.cache_result(url_str, final_profiles)
-            
-            return final_profiles
+            found = len(site_profiles) + len(css_profiles)
+            if self.ai_enabled and found < max_profiles and not self.should_skip_ai(site_profiles):
+                previews = asyncio.Queue()
+                ai_task = asyncio.ensure_future(self.extract_ai(document, url, budget, previews.put_nowait))
+                async for strategy, strategy_profiles in self.drain_ai(ai_task, previews):
+                    yield strategy, strategy_profiles
+        except CPUBudgetExceeded as e:
+            print(f"⏭️  {e}, skipping remaining strategies")
+    
+    async def extract_concurrently(self, document: ParsedDocument, url: str, max_profiles: int,
+                                   budget: Optional[CPUBudget] = None) -> AsyncIterator[Tuple[str, List[Profile]]]:
+        """Run CPU-bound extractors in the worker pool, starting the AI call alongside CSS extraction
+        once the site-specific result clears the early-exit policy; yields results in completion order"""
+        pending = {
+            asyncio.ensure_future(
+                self.extraction_pool.run(self.run_site_extractor, document, url, budget=budget)
+            ): "site_specific",
+            asyncio.ensure_future(
+                self.extraction_pool.run(self.css_extractor.extract, document, url, budget=budget)
+            ): "css_selectors",
+        }
+        
+        ai_task = None
+        ai_decided = not self.ai_enabled
+        previews = asyncio.Queue()
+        
+        try:
+            site_profiles = []
+            found = 0
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    strategy = pending.pop(future)
+                    try:
+                        strategy_profiles = future.result()
+                    except CPUBudgetExceeded as e:
+                        print(f"⏭️  {e}, skipping {strategy}")
+                        continue
+                    if strategy == "site_specific":
+                        site_profiles = strategy_profiles
+                    found += len(strategy_profiles)
+                    yield strategy, strategy_profiles
+                
+                # Decide before calling the model: a started call is billed and holds a limiter slot,
+                # so a page the policy skips must never start one
+                if not ai_decided and "site_specific" not in pending.values():
+                    ai_decided = True
+                    if self.should_skip_ai(site_profiles):
+                        print("⏭️  Site-specific result is high confidence, skipping AI extraction")
+                    elif found >= max_profiles:
+                        print("⏭️  Enough profiles from CPU strategies, skipping AI extraction")
+                    else:
+                        ai_task = asyncio.create_task(self.extract_ai(document, url, budget, previews.put_nowait))
             
-        except Exception as e:
-            print(f"Scraping error: {e}")
-            return []
+            if ai_task:
+                # Once started, the answer is used (and cached) even if CSS extraction filled max_profiles meanwhile
+                try:
+                    async for strategy, strategy_profiles in self.drain_ai(ai_task, previews):
+                        yield strategy, strategy_profiles
+                except Exception as e:
+                    print(f"AI extraction error: {e}")
+                    yield "ai_extraction", []
+        finally:
+            for future in pending:
+                future.cancel()
+            if ai_task and not ai_task.done():
+                ai_task.cancel()
+    
+    async def extract_in_worker_process(self, html: str, url: str, max_profiles: int,
+                                        budget: Optional[CPUBudget] = None) -> AsyncIterator[Tuple[str, List[Profile]]]:
+        """Run parse + site-specific + CSS extraction in a worker process, then AI on the text it returns"""
+        results = await self.extraction_pool.run(
+            extract_in_process,
+            html.encode('utf-8'),
+            url,
+            max_profiles,
+            self.ai_enabled,
+            budget.seconds if budget else 0,
+            # Enough text for every chunk; the chunks are cut from it back here
+            self.ai_extractor.max_content_chars * max(1, self.ai_extractor.max_chunks),
+            budget=budget
+        )
+        
+        site_profiles = []
+        found = 0
+        for strategy in ("site_specific", "css_selectors"):
+            if results[strategy] is None:
+                print(f"⏭️  CPU budget used up in the worker, skipping {strategy}")
+                continue
+            strategy_profiles = deserialize_profiles(results[strategy])
+            if strategy == "site_specific":
+                site_profiles = strategy_profiles
+            found += len(strategy_profiles)
+            yield strategy, strategy_profiles
+        
+        cleaned_text = results["cleaned_text"]
+        if cleaned_text is not None and found < max_profiles and not self.should_skip_ai(site_profiles):
+            document = ParsedDocument.from_cleaned_text(cleaned_text)
+            previews = asyncio.Queue()
+            ai_task = asyncio.ensure_future(self.ai_extractor.extract(document, url, previews.put_nowait))
+            async for strategy, strategy_profiles in self.drain_ai(ai_task, previews):
+                yield strategy, strategy_profiles
+    
+    def run_site_extractor(self, document: ParsedDocument, url: str) -> List[Profile]:
+        """Run the site-specific extractor inside a worker thread (it never actually awaits)"""
+        return asyncio.run(self.site_extractor.extract(document, url))
+    
+    async def extract_ai(self, document: ParsedDocument, url: str, budget: Optional[CPUBudget] = None,
+                         on_profile: Optional[Callable[[Profile], None]] = None) -> List[Profile]:
+        """Build the cleaned-text chunks in the worker pool, then run AI extraction"""
+        await self.extraction_pool.run(self.ai_extractor.chunk_content, document, budget=budget)
+        return await self.ai_extractor.extract(document, url, on_profile)
+    
+    async def drain_ai(self, ai_task: asyncio.Future,
+                       previews: asyncio.Queue) -> AsyncIterator[Tuple[str, List[Profile]]]:
+        """Yield (AI_PREVIEW, [profile]) as the model streams each profile, then ("ai_extraction", all of them)"""
+        next_preview = None
+        try:
+            while True:
+                next_preview = asyncio.ensure_future(previews.get())
+                done, _ = await asyncio.wait({next_preview, ai_task}, return_when=asyncio.FIRST_COMPLETED)
+                if next_preview not in done:
+                    break
+                yield AI_PREVIEW, [next_preview.result()]
+            while not previews.empty():
+                yield AI_PREVIEW, [previews.get_nowait()]
+            yield "ai_extraction", ai_task.result()
+        finally:
+            if next_preview is not None and not next_preview.done():
+                next_preview.cancel()
+            if not ai_task.done():
+                ai_task.cancel()
+    
+    def should_skip_ai(self, site_profiles: List[Profile]) -> bool:
+        """Early-exit policy: skip AI when site-specific extraction is already confident"""
+        return any(profile.confidence >= self.ai_skip_confidence for profile in site_profiles)
     
     async def fetch_html(self, url: str) -> Optional[str]:
         """Fetch HTML content from URL with proper headers and LinkedIn-specific handling"""
+        page = await self.fetch_page(url)
+        return page.html
+    
+    async def fetch_page(self, url: str) -> FetchResult:
+        """Fetch a URL once, returning its HTML together with the validation verdict"""
+        # Check if this is a LinkedIn URL and needs special handling
+        if 'linkedin.com' in url:
+            try:
+                return await self.fetch_linkedin_page(url)
+            except Exception as e:
+                print(f"Error fetching HTML: {e}")
+                return FetchResult(url=url, error=str(e))
+        
+        return await self.fetch_direct(url)
+    
+    async def fetch_direct(self, url: str, timeout: float = 30.0) -> FetchResult:
+        """One plain GET through the shared connection pool, with no site-specific fallbacks"""
         try:
-            # Check if this is a LinkedIn URL and needs special handling
-            if 'linkedin.com' in url:
-                return await self.fetch_linkedin_html(url)
-            
             headers = {
                 'User-Agent': self.user_agent.random,
                 'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
@@ -159,24 +595,23 @@ class ProfileScrapingService:
                 'Upgrade-Insecure-Requests': '1',
             }
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(url, headers=headers)
-                
-                # Don't raise for status - handle different response codes
-                if response.status_code == 200:
-                    return response.text
-                elif response.status_code in [403, 429, 401]:
-                    # Some sites return these but still have content
-                    return response.text
-                else:
-                    # For other status codes, try to get content anyway
-                    return response.text
+            response = await self.http_pool.get(url, headers=headers, timeout=timeout)
+            content_type = response.headers.get('content-type', '')
+            
+            # Don't raise for status - sites returning 401/403/429 often still have content
+            return FetchResult(
+                url=url,
+                status_code=response.status_code,
+                content_type=content_type,
+                html=response.text,
+                valid=self.is_valid_response(response.status_code, content_type)
+            )
                 
         except Exception as e:
             print(f"Error fetching HTML: {e}")
-            return None
+            return FetchResult(url=url, error=str(e))
     
-    async def fetch_linkedin_html(self, url: str) -> Optional[str]:
+    async def fetch_linkedin_page(self, url: str) -> FetchResult:
         """Special handling for LinkedIn URLs with enhanced anti-detection measures"""
         try:
             # Enhanced headers for LinkedIn
@@ -196,66 +631,89 @@ class ProfileScrapingService:
             }
             
             # Try multiple approaches for LinkedIn
+            archive_url = await self.get_archive_url(url)
             approaches = [
                 ('direct', url, headers),
                 ('google_cache', f"https://webcache.googleusercontent.com/search?q=cache:{url}", headers),
-                ('archive_org', await self.get_archive_url(url), headers) if await self.get_archive_url(url) else None
+                ('archive_org', archive_url, headers) if archive_url else None
             ]
             
             # Filter out None approaches
             approaches = [a for a in approaches if a is not None]
             
-            async with httpx.AsyncClient(timeout=30.0, follow_redirects=True) as client:
-                for approach_name, approach_url, approach_headers in approaches:
-                    try:
-                        print(f"🔍 Trying LinkedIn {approach_name} approach...")
-                        
-                        # Add delay to avoid rate limiting
-                        await asyncio.sleep(random.uniform(2, 5))
-                        
-                        response = await client.get(approach_url, headers=approach_headers)
-                        
-                        if response.status_code == 200:
-                            content = response.text
-                            if self.has_linkedin_profile_content(content):
-                                print(f"✅ LinkedIn {approach_name} approach successful!")
-                                return content
-                        elif response.status_code == 429:
-                            print(f"⚠️  Rate limited on {approach_name}, trying next approach...")
-                            continue
-                        
-                    except Exception as e:
-                        print(f"❌ LinkedIn {approach_name} approach failed: {e}")
+            # The direct response decides whether the URL itself is valid
+            direct_result = FetchResult(url=url, error="Direct LinkedIn request failed")
+            
+            for approach_name, approach_url, approach_headers in approaches:
+                try:
+                    print(f"🔍 Trying LinkedIn {approach_name} approach...")
+                    
+                    # Add delay to avoid rate limiting
+                    await asyncio.sleep(random.uniform(2, 5))
+                    
+                    response = await self.http_pool.get(
+                        approach_url,
+                        headers=approach_headers,
+                        timeout=30.0,
+                        follow_redirects=True
+                    )
+                    content_type = response.headers.get('content-type', '')
+                    
+                    if approach_name == 'direct':
+                        direct_result = FetchResult(
+                            url=url,
+                            status_code=response.status_code,
+                            content_type=content_type,
+                            valid=self.is_valid_response(response.status_code, content_type)
+                        )
+                    
+                    if response.status_code == 200:
+                        content = response.text
+                        if await self.extraction_pool.run(self.has_linkedin_profile_content, content):
+                            print(f"✅ LinkedIn {approach_name} approach successful!")
+                            return FetchResult(
+                                url=url,
+                                status_code=response.status_code,
+                                content_type=content_type,
+                                html=content,
+                                valid=True
+                            )
+                    elif response.status_code == 429:
+                        print(f"⚠️  Rate limited on {approach_name}, trying next approach...")
                         continue
+                    
+                except Exception as e:
+                    print(f"❌ LinkedIn {approach_name} approach failed: {e}")
+                    continue
             
             print("❌ All LinkedIn approaches failed")
-            return None
+            return direct_result
             
         except Exception as e:
             print(f"Error fetching LinkedIn HTML: {e}")
-            return None
+            return FetchResult(url=url, error=str(e))
     
     async def get_archive_url(self, url: str) -> Optional[str]:
         """Get archived version URL from Archive.org"""
         try:
             api_url = f"https://archive.org/wayback/available?url={url}"
             
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(api_url)
-                if response.status_code == 200:
-                    data = response.json()
-                    if data.get('archived_snapshots', {}).get('closest', {}).get('available'):
-                        return data['archived_snapshots']['closest']['url']
+            response = await self.http_pool.get(api_url, timeout=10.0)
+            if response.status_code == 200:
+                data = response.json()
+                if data.get('archived_snapshots', {}).get('closest', {}).get('available'):
+                    return data['archived_snapshots']['closest']['url']
         except:
             pass
         return None
     
-    def has_linkedin_profile_content(self, html: str) -> bool:
+    @staticmethod
+    def has_linkedin_profile_content(html: str) -> bool:
         """Check if HTML contains actual LinkedIn profile content"""
         if not html or len(html) < 1000:
             return False
             
-        soup = BeautifulSoup(html, 'html.parser')
+        soup = parse_html(html)
         
         # Look for profile indicators
         profile_indicators = [
@@ -289,120 +747,15 @@ class ProfileScrapingService:
         return indicator_count >= 2
     
     def remove_duplicates(self, profiles: List[Profile]) -> List[Profile]:
-        """Remove duplicate profiles based on name and email with improved logic"""
-        seen = set()
-        unique_profiles = []
-        
-        # Sort profiles by confidence (highest first) to keep best quality
-        sorted_profiles = sorted(profiles, key=lambda x: x.confidence, reverse=True)
-        
-        for profile in sorted_profiles:
-            # Create a unique identifier based on name and company
-            identifier = f"{profile.name or 'unknown'}_{profile.company or 'no-company'}"
-            
-            # Also check for very similar names (typos, variations)
-            if self.is_similar_profile(profile, unique_profiles):
-                continue
-                
-            if identifier not in seen:
-                seen.add(identifier)
-                unique_profiles.append(profile)
-        
-        return unique_profiles
-    
-    def is_similar_profile(self, profile: Profile, existing_profiles: List[Profile]) -> bool:
-        """Check if profile is too similar to existing ones"""
-        if not profile.name:
-            return False
-            
-        for existing in existing_profiles:
-            if not existing.name:
-                continue
-                
-            # Check if names are very similar (typos, variations)
-            if self.names_are_similar(profile.name, existing.name):
-                # If they're from the same company, likely duplicates
-                if profile.company and existing.company and profile.company == existing.company:
-                    return True
-                    
-                # If they have very similar titles, likely duplicates
-                if profile.title and existing.title and self.titles_are_similar(profile.title, existing.title):
-                    return True
-        
-        return False
-    
-    def names_are_similar(self, name1: str, name2: str) -> bool:
-        """Check if two names are very similar (typos, variations)"""
-        if not name1 or not name2:
-            return False
-            
-        # Convert to lowercase and remove extra spaces
-        name1_clean = ' '.join(name1.lower().split())
-        name2_clean = ' '.join(name2.lower().split())
-        
-        # Exact match
-        if name1_clean == name2_clean:
-            return True
-            
-        # Check for common variations
-        if name1_clean.replace(' ', '') == name2_clean.replace(' ', ''):
-            return True
-            
-        # Check for initials vs full names
-        if self.is_initials_vs_full_name(name1_clean, name2_clean):
-            return True
-            
-        return False
-    
-    def is_initials_vs_full_name(self, name1: str, name2: str) -> bool:
-        """Check if one name is initials and the other is full name"""
-        # Split names into parts
-        parts1 = name1.split()
-        parts2 = name2.split()
-        
-        # Check if one is initials (single letters)
-        if len(parts1) == 1 and len(parts2) > 1:
-            if len(parts1[0]) == 1 and parts1[0].upper() == parts1[0]:
-                # Check if initials match first letters of full name
-                if parts1[0].upper() == parts2[0][0].upper():
-                    return True
-                    
-        elif len(parts2) == 1 and len(parts1) > 1:
-            if len(parts2[0]) == 1 and parts2[0].upper() == parts2[0]:
-                # Check if initials match first letters of full name
-                if parts2[0].upper() == parts1[0][0].upper():
-                    return True
-        
-        return False
-    
-    def titles_are_similar(self, title1: str, title2: str) -> bool:
-        """Check if two titles are very similar"""
-        if not title1 or not title2:
-            return False
-            
-        # Convert to lowercase and remove extra spaces
-        title1_clean = ' '.join(title1.lower().split())
-        title2_clean = ' '.join(title2.lower().split())
-        
-        # Exact match
-        if title1_clean == title2_clean:
-            return True
-            
-        # Check for common variations
-        if title1_clean.replace(' ', '') == title2_clean.replace(' ', ''):
-            return True
-            
-        return False
+        """Remove duplicate profiles based on name, company and title"""
+        # Blocked matching (dedup.py): each profile is only compared within its name/initial blocks
+        return remove_duplicates(profiles)
     
     def get_cached_result(self, url: str) -> Optional[List[Profile]]:
         """Get cached result if available and not expired"""
-        if url in self.cache:
-            entry = self.cache[url]
-            if datetime.now() < entry.expires_at:
-                return entry.profiles
-            else:
-                # Remove expired entry
-                del self.cache[url]
+        entry = self.cache.get(canonicalize_url(url))
+        if entry:
+            return entry.profiles
         return None
     
     def cache_result(self, url: str, profiles: List[Profile]):
@@ -416,21 +769,42 @@ class ProfileScrapingService:
             expires_at=expires_at
         )
         
-        self.cache[url] = cache_entry
+        # The cache evicts expired and least recently used entries itself
+        self.cache.set(canonicalize_url(url), cache_entry, expires_at.timestamp())
         
-        # Clean up old cache entries
-        self.cleanup_cache()
+        # Merge into the person index; only the keys these profiles carry are looked up
+        self.entity_index.add_all(profiles)
+        if self.entity_rebuild is not None:
+            self.entity_backlog.extend(profiles)
+        elif self.entity_index.is_full():
+            # Let profiles the cache has dropped (and the oldest cached ones) fall out of the index
+            self.entity_rebuild = asyncio.ensure_future(self.rebuild_entity_index())
+    
+    async def rebuild_entity_index(self):
+        """Re-seed the person index from the cache in a worker thread, then swap it in"""
+        try:
+            index = EntityIndex(max_profiles=self.entity_index.max_profiles)
+            if isinstance(self.cache, SQLiteCache):
+                # Decoding every row is the slow part, and SQLiteCache may be read from any thread
+                load = self.get_cached_profiles
+            else:
+                # The memory cache isn't thread-safe, but listing it is only a copy of references
+                cached_profiles = self.get_cached_profiles()
+                load = lambda: cached_profiles
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, lambda: index.rebuild(load()))
+            # Results cached while the worker ran may be missing from its snapshot
+            index.add_all(self.entity_backlog)
+            self.entity_index = index
+        except Exception as e:
+            print(f"❌ Person index rebuild failed: {e}")
+        finally:
+            self.entity_backlog = []
+            self.entity_rebuild = None
     
     def cleanup_cache(self):
         """Remove expired cache entries"""
-        current_time = datetime.now()
-        expired_urls = [
-            url for url, entry in self.cache.items()
-            if current_time > entry.expires_at
-        ]
-        
-        for url in expired_urls:
-            del self.cache[url]
+        self.cache.purge_expired()
     
     def get_cached_profiles(self) -> List[Profile]:
         """Get all cached profiles"""
@@ -439,10 +813,33 @@ class ProfileScrapingService:
             all_profiles.extend(entry.profiles)
         return all_profiles
     
+    def get_people(self) -> List[Person]:
+        """Get profiles from every scraped URL merged into one record per person"""
+        return self.entity_index.get_people()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get service statistics (connection pool, extraction pool, caches, in-flight scrapes and jobs)"""
+        return {
+            "http_pool": self.http_pool.get_stats(),
+            "extraction_pool": self.extraction_pool.get_stats(),
+            "cache": self.get_cache_stats(),
+            "ai_cache": self.ai_cache.get_stats(),
+            "ai_limiter": {**self.model_limiter.get_stats(), "retry_budget": self.ai_retry_budget.get_stats()},
+            "ai_batcher": self.ai_extractor.batcher.get_stats() if self.ai_extractor.batcher else None,
+            "inflight": self.inflight.get_stats(),
+            "entities": self.entity_index.get_stats(),
+            "jobs": self.jobs.get_stats()
+        }
+    
     def get_cache_stats(self) -> Dict[str, Any]:
-        """Get cache statistics"""
+        """Get cache statistics (profile totals only for the memory cache; SQLite would decode every entry)"""
+        stats = self.cache.get_stats()
+        total_cached_profiles = None
+        if isinstance(self.cache, LRUCache):
+            total_cached_profiles = sum(len(entry.profiles) for entry in self.cache.values())
         return {
-            "total_cached_urls": len(self.cache),
-            "total_cached_profiles": sum(len(entry.profiles) for entry in self.cache.values()),
-            "cache_size_mb": sum(len(str(entry)) for entry in self.cache.values()) / (1024 * 1024)
+            "total_cached_urls": stats["entries"],
+            "total_cached_profiles": total_cached_profiles,
+            "cache_size_mb": stats["bytes"] / (1024 * 1024),
+            **stats
         }
@@ -0,0 +1,70 @@
+import asyncio
+from typing import Any, AsyncIterator, Callable, Dict, Hashable, List
+
+class _SharedStream:
+    """Items of one async iterator, produced by a background task and replayed to every consumer"""
+
+    def __init__(self, source: AsyncIterator[Any]):
+        self.items: List[Any] = []
+        self._changed = asyncio.Event()
+        self.task = asyncio.ensure_future(self._produce(source))
+        # Consumers wake up on completion only after the owner's own done callbacks have run
+        self.task.add_done_callback(lambda done: self._notify())
+
+    async def _produce(self, source: AsyncIterator[Any]):
+        async for item in source:
+            self.items.append(item)
+            self._notify()
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def follow(self) -> AsyncIterator[Any]:
+        """Every item from the first one, then the producer's error if it failed"""
+        index = 0
+        while True:
+            if index < len(self.items):
+                yield self.items[index]
+                index += 1
+            elif self.task.done():
+                self.task.result()
+                return
+            else:
+                # A consumer leaving only cancels this wait, never the shared producer
+                await self._changed.wait()
+
+class SingleFlight:
+    """Coalesce concurrent runs of the same keyed async iterator into one shared producer"""
+
+    def __init__(self):
+        self._streams: Dict[Hashable, _SharedStream] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    def stream(self, key: Hashable, make: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        """Iterate make() once per key at a time; concurrent consumers each see every item, late joiners from the start"""
+        shared = self._streams.get(key)
+        if shared is None:
+            shared = _SharedStream(make())
+            self._streams[key] = shared
+            shared.task.add_done_callback(lambda done: self._forget(key, shared))
+            self.calls += 1
+        else:
+            self.coalesced += 1
+        return shared.follow()
+
+    def _forget(self, key: Hashable, shared: _SharedStream):
+        if self._streams.get(key) is shared:
+            del self._streams[key]
+        # Mark the exception as retrieved in case every consumer left
+        if not shared.task.cancelled():
+            shared.task.exception()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get in-flight request statistics"""
+        return {
+            "in_flight": len(self._streams),
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+        }
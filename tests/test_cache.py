@@ -0,0 +1,90 @@
+import json
+import sqlite3
+import time
+
+from cache import LRUCache, SQLiteCache
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2)
+    cache.set('a', 1, time.time() + 60)
+    cache.set('b', 2, time.time() + 60)
+    cache.get('a')
+    cache.set('c', 3, time.time() + 60)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert cache.evictions == 1
+
+def test_lru_byte_budget_and_expiry():
+    cache = LRUCache(max_entries=10, max_bytes=10, sizeof=len)
+    cache.set('a', 'x' * 6, time.time() + 60)
+    cache.set('b', 'y' * 6, time.time() + 60)
+    assert 'a' not in cache
+    assert cache.total_bytes == 6
+
+    cache.set('old', 'z', time.time() - 1)
+    assert cache.get('old') is None
+    assert cache.values() == ['y' * 6]
+
+def test_sqlite_round_trip_and_persistence(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    cache = SQLiteCache(path, json.dumps, json.loads)
+    cache.set('page', {'profiles': [1, 2]}, time.time() + 60)
+    cache.set('gone', {'profiles': []}, time.time() - 1)
+    cache.close()
+
+    reopened = SQLiteCache(path, json.dumps, json.loads)
+    assert reopened.get('page') == {'profiles': [1, 2]}
+    assert reopened.get('gone') is None
+    assert len(reopened) == 1
+
+def test_sqlite_limits_use_running_counts(tmp_path):
+    cache = SQLiteCache(str(tmp_path / 'cache.db'), json.dumps, json.loads, max_entries=5)
+    for i in range(20):
+        cache.set(f'k{i}', i, time.time() + 60)
+    cache.set('k19', 'replaced', time.time() + 60)
+    cache.delete('k18')
+
+    stats = cache.get_stats()
+    assert stats['entries'] == 4
+    assert (cache._entries, cache._bytes) == (stats['entries'], stats['bytes'])
+    assert cache.get('k0') is None
+    assert cache.get('k19') == 'replaced'
+
+def test_sqlite_skips_writes_while_another_worker_holds_the_lock(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    cache = SQLiteCache(path, json.dumps, json.loads, busy_timeout=0.05)
+    cache.set('a', 1, time.time() + 60)
+
+    other = sqlite3.connect(path, isolation_level=None)
+    other.execute('BEGIN IMMEDIATE')
+    try:
+        cache.set('b', 2, time.time() + 60)
+        assert cache.write_conflicts == 1
+        # Readers are not blocked by the writer
+        assert cache.get('a') == 1
+    finally:
+        other.execute('ROLLBACK')
+        other.close()
+
+    assert cache.get('b') is None
+
+def test_sqlite_unreadable_entry_is_a_miss_even_while_locked(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    cache = SQLiteCache(path, json.dumps, json.loads, busy_timeout=0.05)
+    cache.set('a', 1, time.time() + 60)
+    cache._conn.execute("UPDATE cache SET value = 'not json' WHERE key = 'a'")
+
+    other = sqlite3.connect(path, isolation_level=None)
+    other.execute('BEGIN IMMEDIATE')
+    try:
+        # The delete of the bad row is skipped instead of raising into the request
+        assert cache.get('a') is None
+        assert cache.write_conflicts == 1
+    finally:
+        other.execute('ROLLBACK')
+        other.close()
+
+    assert cache.get('a') is None
+    assert len(cache) == 0
@@ -0,0 +1,127 @@
+import random
+
+import pytest
+
+from dedup import DedupIndex, remove_duplicates
+from models import Profile
+
+FIRST_NAMES = ['Ada', 'Grace', 'Linus', 'Margaret', 'Alan', 'Barbara', 'Dennis', 'Ken', 'Radia', 'Frances',
+               'Guido', 'Anita', 'Edsger', 'Shafi', 'Leslie', 'Tim', 'Yukihiro', 'Sophie', 'Niklaus', 'Hedy']
+SURNAMES = ['Lovelace', 'Hopper', 'Torvalds', 'Hamilton', 'Turing', 'Liskov', 'Ritchie', 'Thompson', 'Perlman',
+            'Allen', 'van Rossum', 'Borg', 'Dijkstra', 'Goldwasser', 'Lamport', 'Berners-Lee', 'Matsumoto',
+            'Wilson', 'Wirth', 'Lamarr', 'Stone', 'Nakamura', 'Okafor', 'Silva', 'Novak']
+COMPANIES = ['Acme', 'Globex', 'Initech', 'Umbrella', 'Hooli', 'Stark Industries', 'Wayne Enterprises', None]
+TITLES = ['Software Engineer', 'Staff Engineer', 'Engineering Manager', 'CTO', 'Product Designer',
+          'Data Scientist', 'Head of Research', None]
+
+def synthetic_profiles(count: int, seed: int):
+    """Profiles where roughly a third are variants of an earlier person"""
+    rng = random.Random(seed)
+    people = []
+    profiles = []
+    for _ in range(count):
+        if people and rng.random() < 0.35:
+            name, company, title = rng.choice(people)
+            variant = rng.random()
+            if variant < 0.3:
+                name = name.upper()
+            elif variant < 0.5:
+                name = '  '.join(name.split())
+            elif variant < 0.6:
+                # Initials; only case-less ones (the "3" of "3 Novak") match a full name
+                name = name[0]
+            if title and rng.random() < 0.3:
+                title = rng.choice([title.lower(), title.replace(' ', ''), ' '.join(title.split()) + ' '])
+            if rng.random() < 0.2:
+                company = rng.choice(COMPANIES)
+        else:
+            if rng.random() < 0.05:
+                name = f"{rng.randint(1, 9)} {rng.choice(SURNAMES)}"
+            elif rng.random() < 0.03:
+                name = None
+            else:
+                name = f"{rng.choice(FIRST_NAMES)} {rng.choice(SURNAMES)}"
+            company = rng.choice(COMPANIES)
+            title = rng.choice(TITLES)
+            people.append((name or 'Unknown Person', company, title))
+
+        profiles.append(Profile(
+            name=name,
+            company=company,
+            title=title,
+            extracted_from=f"https://example.com/team/{rng.randint(1, 50)}",
+            confidence=round(rng.random(), 2),
+            extraction_strategy='benchmark'
+        ))
+    return profiles
+
+def reference_remove_duplicates(profiles):
+    """The original pairwise implementation, kept here to check the blocked one against"""
+    def names_are_similar(name1, name2):
+        if not name1 or not name2:
+            return False
+        name1_clean = ' '.join(name1.lower().split())
+        name2_clean = ' '.join(name2.lower().split())
+        if name1_clean == name2_clean:
+            return True
+        if name1_clean.replace(' ', '') == name2_clean.replace(' ', ''):
+            return True
+        parts1 = name1_clean.split()
+        parts2 = name2_clean.split()
+        if len(parts1) == 1 and len(parts2) > 1:
+            if len(parts1[0]) == 1 and parts1[0].upper() == parts1[0]:
+                if parts1[0].upper() == parts2[0][0].upper():
+                    return True
+        elif len(parts2) == 1 and len(parts1) > 1:
+            if len(parts2[0]) == 1 and parts2[0].upper() == parts2[0]:
+                if parts2[0].upper() == parts1[0][0].upper():
+                    return True
+        return False
+
+    def titles_are_similar(title1, title2):
+        if not title1 or not title2:
+            return False
+        title1_clean = ' '.join(title1.lower().split())
+        title2_clean = ' '.join(title2.lower().split())
+        return title1_clean == title2_clean or title1_clean.replace(' ', '') == title2_clean.replace(' ', '')
+
+    def is_similar_profile(profile, existing_profiles):
+        if not profile.name:
+            return False
+        for existing in existing_profiles:
+            if not existing.name:
+                continue
+            if names_are_similar(profile.name, existing.name):
+                if profile.company and existing.company and profile.company == existing.company:
+                    return True
+                if profile.title and existing.title and titles_are_similar(profile.title, existing.title):
+                    return True
+        return False
+
+    seen = set()
+    unique_profiles = []
+    for profile in sorted(profiles, key=lambda x: x.confidence, reverse=True):
+        identifier = f"{profile.name or 'unknown'}_{profile.company or 'no-company'}"
+        if is_similar_profile(profile, unique_profiles):
+            continue
+        if identifier not in seen:
+            seen.add(identifier)
+            unique_profiles.append(profile)
+    return unique_profiles
+
+@pytest.mark.parametrize('seed', [1, 7, 42])
+def test_blocked_dedup_matches_the_pairwise_scan(seed):
+    profiles = synthetic_profiles(1500, seed)
+    assert [p.id for p in remove_duplicates(profiles)] == [p.id for p in reference_remove_duplicates(profiles)]
+
+def test_initials_only_match_case_less_single_characters():
+    kept = Profile(name='Ada Lovelace', company='Acme', extracted_from='https://a.test', confidence=0.9)
+    index = DedupIndex()
+    index.add(kept)
+    for name, similar in [('A', False), ('a', False), ('Ada  LOVELACE', True), ('ada lovelace', True)]:
+        candidate = Profile(name=name, company='Acme', extracted_from='https://b.test', confidence=0.5)
+        assert index.is_similar(candidate) == similar, name
+
+    digit = Profile(name='3 Novak', title='CTO', extracted_from='https://a.test', confidence=0.9)
+    index.add(digit)
+    assert index.is_similar(Profile(name='3', title='cto', extracted_from='https://b.test', confidence=0.5))
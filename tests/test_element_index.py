@@ -0,0 +1,29 @@
+from extractors.document import ParsedDocument
+
+PAGE = """<html><head><title>Team</title></head><body>
+<div class="member"><a href=" /in/jane ">Jane</a><a href="//github.com/jane">code</a></div>
+<div class="member"><a href="mailto:bo@acme.com">Bo</a><a href="tel:123">call</a><a href="">empty</a></div>
+</body></html>"""
+
+def test_anchor_hrefs_are_stripped_and_resolved_against_the_page():
+    document = ParsedDocument.from_html(PAGE, url='https://www.linkedin.com/company/acme/people')
+    assert [anchor.href for anchor in document.index.anchors] == [
+        'https://www.linkedin.com/in/jane', 'https://github.com/jane', 'mailto:bo@acme.com', 'tel:123', '',
+    ]
+
+    first_member = document.index.select_one('.member')
+    assert [anchor.href for anchor in document.index.anchors_within(first_member)] == [
+        'https://www.linkedin.com/in/jane', 'https://github.com/jane',
+    ]
+
+def test_base_href_overrides_the_page_url_and_unknown_urls_stay_relative():
+    document = ParsedDocument.from_html('<head><base href="https://cdn.acme.com/team/"></head><a href="jane">x</a>',
+                                        url='https://acme.com/about')
+    assert [anchor.href for anchor in document.index.anchors] == ['https://cdn.acme.com/team/jane']
+
+    assert [anchor.href for anchor in ParsedDocument.from_html(PAGE).index.anchors][:2] == ['/in/jane', '//github.com/jane']
+
+def test_prefix_selectors_match_soupsieve_in_document_order():
+    document = ParsedDocument.from_html(PAGE)
+    for selector in ['[href^="mailto:"]', 'a[href^="tel:"]', '[href^="/"]', '[class^="mem"]', '[href^="https"]']:
+        assert document.index.select(selector) == document.soup.select(selector), selector
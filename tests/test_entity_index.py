@@ -0,0 +1,62 @@
+from entity_index import EntityIndex, social_key
+from models import Profile, SocialLinks
+
+def profile(url='https://a.test/team', **fields):
+    return Profile(extracted_from=url, confidence=fields.pop('confidence', 0.8), **fields)
+
+def test_social_key_ignores_scheme_case_and_www():
+    assert social_key('http://www.LinkedIn.com/in/Jane/') == social_key('https://linkedin.com/in/jane')
+    assert social_key('github.com/jane') == social_key('https://www.github.com/jane')
+
+def test_social_key_keeps_account_query_params():
+    first = social_key('https://www.facebook.com/profile.php?id=100&ref=bookmarks')
+    assert first == social_key('https://facebook.com/profile.php?id=100')
+    assert first != social_key('https://facebook.com/profile.php?id=200')
+
+def test_social_key_rejects_organization_and_share_links():
+    for link in ['https://linkedin.com/company/acme', 'https://www.linkedin.com/school/mit',
+                 'https://twitter.com/intent/tweet?text=hi', 'https://facebook.com/sharer/sharer.php?u=x',
+                 'https://linkedin.com/sharing/share-offsite', 'https://github.com/']:
+        assert social_key(link) is None, link
+
+def test_profiles_sharing_a_key_merge_transitively():
+    index = EntityIndex()
+    first = index.add(profile(name='Jane Doe', email='jane@acme.com'))
+    second = index.add(profile('https://b.test/people', name='J. Doe', email='JANE@acme.com',
+                               social_links=SocialLinks(github='https://github.com/janedoe')))
+    third = index.add(profile('https://c.test/about', name='Jane',
+                              social_links=SocialLinks(github='http://www.github.com/JaneDoe/')))
+    assert first == second == third
+
+    people = index.get_people()
+    assert len(people) == 1
+    assert len(people[0].sources) == 3
+    assert index.get_stats()["merges"] == 2
+
+def test_company_links_and_bare_names_do_not_merge():
+    index = EntityIndex()
+    index.add(profile(name='Ann Lee', social_links=SocialLinks(linkedin='https://linkedin.com/company/acme')))
+    index.add(profile(name='Bo Chan', social_links=SocialLinks(linkedin='https://linkedin.com/company/acme')))
+    index.add(profile('https://b.test/team', name='Ann Lee'))
+    assert len(index) == 3
+
+    index.add(profile('https://c.test/team', name='Ann Lee', title='CTO'))
+    index.add(profile('https://d.test/team', name='ann  lee', title='cto'))
+    assert len(index) == 4
+
+def test_rescraped_records_replace_their_previous_version():
+    index = EntityIndex()
+    index.add(profile(name='Jane Doe', email='jane@acme.com', confidence=0.5))
+    index.add(profile(name='Jane Doe', email='jane@acme.com', confidence=0.9))
+    assert index.profile_count == 1
+    assert index.get_people()[0].confidence == 0.9
+
+def test_rebuild_keeps_the_newest_half():
+    index = EntityIndex(max_profiles=4)
+    profiles = [profile(f'https://a.test/{i}', name=f'Person {i}') for i in range(5)]
+    index.add_all(profiles)
+    assert index.is_full()
+
+    index.rebuild(profiles)
+    assert index.profile_count == 2
+    assert {person.name for person in index.get_people()} == {'Person 3', 'Person 4'}
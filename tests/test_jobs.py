@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+
+from jobs import JobManager, QueueFullError
+from models import Profile
+
+def make_profiles(url, count):
+    return [Profile(name=f'Person {i}', extracted_from=url, confidence=0.9, extraction_strategy='css_selectors')
+            for i in range(count)]
+
+async def wait_until_finished(job):
+    # Workers update the job in place; manager.get() would prune it once it expires
+    while job.completed_at is None:
+        await asyncio.sleep(0.001)
+    return job
+
+def test_completed_job_keeps_its_profiles():
+    async def scrape(url, max_profiles):
+        return make_profiles(url, max_profiles)
+
+    async def main():
+        manager = JobManager(scrape, workers=1)
+        job = await manager.submit('https://a.test/team', max_profiles=3)
+        assert job.status == 'pending'
+        job = await wait_until_finished(job)
+        await manager.close()
+        return manager, job
+
+    manager, job = asyncio.run(main())
+    assert job.status == 'completed'
+    assert job.profiles_found == 3
+    assert job.strategies == ['css_selectors']
+    assert manager.get_stats()['completed'] == 1
+
+def test_failed_job_records_the_error():
+    async def scrape(url, max_profiles):
+        raise ValueError('site is down')
+
+    async def main():
+        manager = JobManager(scrape, workers=1)
+        job = await manager.submit('https://a.test/team')
+        job = await wait_until_finished(job)
+        await manager.close()
+        return manager, job
+
+    manager, job = asyncio.run(main())
+    assert job.status == 'failed'
+    assert job.error == 'site is down'
+    assert job.profiles == []
+    assert manager.get_stats()['failed'] == 1
+
+def test_full_queue_rejects_new_jobs():
+    release = None
+
+    async def scrape(url, max_profiles):
+        await release.wait()
+        return []
+
+    async def main():
+        nonlocal release
+        release = asyncio.Event()
+        manager = JobManager(scrape, workers=1, max_queue=1)
+        running = await manager.submit('https://a.test/1')
+        # Let the only worker take the first job off the queue
+        await asyncio.sleep(0)
+        await manager.submit('https://a.test/2')
+        with pytest.raises(QueueFullError):
+            await manager.submit('https://a.test/3')
+        release.set()
+        await wait_until_finished(running)
+        await manager.close()
+        return manager
+
+    stats = asyncio.run(main()).get_stats()
+    assert stats['submitted'] == 2
+    assert stats['rejected'] == 1
+
+def test_finished_jobs_expire_after_retention_and_over_max_jobs():
+    async def scrape(url, max_profiles):
+        return []
+
+    async def run_jobs(manager, count):
+        jobs = [await manager.submit(f'https://a.test/{i}') for i in range(count)]
+        for job in jobs:
+            await wait_until_finished(job)
+        await manager.close()
+        return jobs
+
+    expiring = JobManager(scrape, workers=1, retention_seconds=0)
+    (job,) = asyncio.run(run_jobs(expiring, 1))
+    assert expiring.get(job.id) is None
+
+    capped = JobManager(scrape, workers=1, max_jobs=2)
+    jobs = asyncio.run(run_jobs(capped, 3))
+    assert capped.get(jobs[0].id) is None
+    assert capped.get(jobs[2].id) is not None
+    assert capped.get_stats()['stored_jobs'] == 2
+
+def test_api_returns_429_with_retry_after_when_the_queue_is_full(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('AI_CACHE_DB_PATH', '')
+    from fastapi.testclient import TestClient
+    import main
+
+    async def scrape(url, max_profiles):
+        return []
+
+    # No workers, so the single queue slot stays taken
+    monkeypatch.setattr(main.scraping_service, 'jobs', JobManager(scrape, workers=0, max_queue=1))
+    client = TestClient(main.app)
+
+    accepted = client.post('/api/jobs', json={'url': 'https://a.test/1'})
+    assert accepted.status_code == 202
+    assert client.get(accepted.json()['status_url']).json()['status'] == 'pending'
+
+    rejected = client.post('/api/jobs', json={'url': 'https://a.test/2'})
+    assert rejected.status_code == 429
+    assert rejected.headers['Retry-After'] == '5'
+    assert client.get('/api/jobs/unknown').status_code == 404
+
+    # Polling has its own limit, so it can't use up the one shared by the other endpoints
+    status_url = accepted.json()['status_url']
+    assert {client.get(status_url).status_code for _ in range(20)} == {200}
+    assert client.get('/api/health').status_code == 200
@@ -0,0 +1,40 @@
+import json
+
+import pytest
+
+from extractors.json_stream import JSONStreamParser, parse_json_object
+
+ANSWER = {
+    "profiles": [
+        {"name": 'Jane "JD" Doe', "bio": "Braces {} and [brackets], colons: fine \\ too"},
+        {"name": "Bob", "socialLinks": {"github": "https://github.com/bob"}},
+    ],
+    "notes": {"profiles": [{"ignored": True}]},
+}
+
+def test_items_are_yielded_as_soon_as_they_close():
+    text = "```json\n" + json.dumps(ANSWER) + "\n```"
+    parser = JSONStreamParser('profiles')
+    second_item = text.index('{"name": "Bob"')
+
+    assert parser.feed(text[:second_item]) == [ANSWER["profiles"][0]]
+    assert parser.feed(text[second_item:]) == [ANSWER["profiles"][1]]
+    assert parser.found_array and parser.done
+
+@pytest.mark.parametrize('size', [1, 2, 7, 64])
+def test_any_chunking_gives_the_same_items(size):
+    text = 'Here you go: ' + json.dumps(ANSWER, indent=2)
+    parser = JSONStreamParser('profiles')
+    items = []
+    for start in range(0, len(text), size):
+        items.extend(parser.feed(text[start:start + size]))
+    assert items == ANSWER["profiles"]
+
+def test_parse_json_object_ignores_trailing_text():
+    text = json.dumps(ANSWER) + '\nI skipped the {footer} section.'
+    assert parse_json_object(text) == ANSWER
+    assert parse_json_object('no json here') is None
+
+def test_parse_json_object_rejects_unterminated_answers():
+    with pytest.raises(json.JSONDecodeError):
+        parse_json_object('{"profiles": [{"name": "Jane"}')
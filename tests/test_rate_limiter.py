@@ -0,0 +1,124 @@
+import asyncio
+
+import pytest
+from google.api_core import exceptions as google_exceptions
+
+from extractors.ai_extractor import AIProfileExtractor
+from rate_limiter import ModelRateLimiter, RetryBudget
+
+class FakeClock:
+    """Monotonic clock that only moves when a sleep is awaited"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+def make_limiter(clock, **limits):
+    return ModelRateLimiter(clock=clock, sleep=clock.sleep, **limits)
+
+def test_request_bucket_starts_full_and_refills_over_time():
+    clock = FakeClock()
+    limiter = make_limiter(clock, requests_per_minute=2, tokens_per_minute=0)
+
+    async def main():
+        for _ in range(3):
+            await limiter.acquire()
+
+    asyncio.run(main())
+    # Two calls from the full bucket, then one request refills every 30 s
+    assert clock.sleeps == [pytest.approx(30)]
+    assert limiter.get_stats()['throttled'] == 1
+
+    # A long idle period refills the bucket only up to its size
+    clock.now += 3600
+    clock.sleeps.clear()
+    asyncio.run(main())
+    assert clock.sleeps == [pytest.approx(30)]
+
+def test_token_bucket_waits_for_large_prompts():
+    clock = FakeClock()
+    limiter = make_limiter(clock, requests_per_minute=0, tokens_per_minute=600)
+
+    async def main():
+        await limiter.acquire(600)
+        await limiter.acquire(300)
+        # More than a minute of quota is capped to the bucket size instead of waiting forever
+        await limiter.acquire(10_000)
+
+    asyncio.run(main())
+    assert clock.sleeps == [pytest.approx(30), pytest.approx(60)]
+
+def test_pause_holds_back_callers_even_with_quota_left():
+    clock = FakeClock()
+    limiter = make_limiter(clock, requests_per_minute=60, tokens_per_minute=0)
+    limiter.pause(10)
+    limiter.pause(5)
+
+    asyncio.run(limiter.acquire())
+    assert clock.sleeps == [pytest.approx(10)]
+    assert limiter.get_stats()['pauses'] == 2
+
+def test_retry_budget_scales_with_calls_and_forgets_old_ones():
+    clock = FakeClock()
+    budget = RetryBudget(ratio=0.5, min_retries=2, window_seconds=60, clock=clock)
+
+    assert [budget.can_retry() for _ in range(3)] == [True, True, False]
+    for _ in range(4):
+        budget.record_call()
+    assert [budget.can_retry() for _ in range(3)] == [True, True, False]
+    assert budget.get_stats()['exhausted'] == 2
+
+    clock.now += 61
+    assert budget.get_stats()['retries_in_window'] == 4
+    assert budget.can_retry()
+    assert budget.get_stats() == {"ratio": 0.5, "calls_in_window": 0, "retries_in_window": 1, "exhausted": 2}
+
+class Response:
+    def __init__(self, text):
+        self.text = text
+
+class FlakyModel:
+    model_name = 'fake'
+
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    async def generate_content_async(self, prompt):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return Response('{"profiles": [{"name": "Ann Lee"}]}')
+
+def test_rate_limited_call_pauses_the_shared_limiter_and_retries():
+    clock = FakeClock()
+    limiter = make_limiter(clock, requests_per_minute=60, tokens_per_minute=0)
+    model = FlakyModel([google_exceptions.TooManyRequests('quota')])
+    extractor = AIProfileExtractor(model, rate_limiter=limiter, retry_budget=RetryBudget(clock=clock))
+
+    result = asyncio.run(extractor.call_model('prompt', extractor.parse_page_response))
+    assert result == [{"name": "Ann Lee"}]
+    assert model.calls == 2
+    # The backoff is waited out inside acquire(), so every caller sharing the quota sees it
+    assert limiter.get_stats()['pauses'] == 1
+    assert len(clock.sleeps) == 1
+    assert extractor.backoff_base_seconds / 2 <= clock.sleeps[0] <= extractor.backoff_base_seconds
+
+def test_exhausted_retry_budget_gives_up_without_retrying():
+    clock = FakeClock()
+    model = FlakyModel([google_exceptions.ServiceUnavailable('down')])
+    extractor = AIProfileExtractor(model, rate_limiter=make_limiter(clock),
+                                   retry_budget=RetryBudget(ratio=0, min_retries=0, clock=clock))
+    # Non-rate-limit failures back off with a real sleep before the budget is asked
+    extractor.backoff_base_seconds = 0.01
+
+    assert asyncio.run(extractor.call_model('prompt', extractor.parse_page_response)) is None
+    assert model.calls == 1
+    assert extractor.retry_budget.get_stats()['exhausted'] == 1
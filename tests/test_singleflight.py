@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+from singleflight import SingleFlight
+
+def test_stream_consumers_share_one_producer_and_replay_from_the_start():
+    flight = SingleFlight()
+    runs = []
+
+    async def items():
+        runs.append(1)
+        for item in ('ai_preview', 'final'):
+            await asyncio.sleep(0.01)
+            yield item
+
+    async def collect():
+        return [item async for item in flight.stream('key', items)]
+
+    async def main():
+        first = asyncio.ensure_future(collect())
+        await asyncio.sleep(0.015)
+        # Joins after the first item was produced
+        second = asyncio.ensure_future(collect())
+        return await asyncio.gather(first, second)
+
+    assert asyncio.run(main()) == [['ai_preview', 'final']] * 2
+    assert len(runs) == 1
+    assert flight.get_stats() == {"in_flight": 0, "calls": 1, "coalesced": 1}
+
+def test_stream_errors_reach_every_consumer():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0)
+        raise ValueError('boom')
+        yield
+
+    async def collect():
+        return [item async for item in flight.stream('key', fail)]
+
+    async def main():
+        return await asyncio.gather(collect(), collect(), return_exceptions=True)
+
+    assert all(isinstance(result, ValueError) for result in asyncio.run(main()))
+
+def test_consumer_leaving_does_not_cancel_the_shared_producer():
+    flight = SingleFlight()
+    produced = []
+
+    async def items():
+        for item in ('site_specific', 'final'):
+            await asyncio.sleep(0.01)
+            produced.append(item)
+            yield item
+
+    async def first_item():
+        async for item in flight.stream('key', items):
+            return item
+
+    async def collect():
+        return [item async for item in flight.stream('key', items)]
+
+    async def main():
+        leaver = asyncio.ensure_future(first_item())
+        stayer = asyncio.ensure_future(collect())
+        await asyncio.sleep(0)
+        leaver.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leaver
+        return await stayer
+
+    assert asyncio.run(main()) == ['site_specific', 'final']
+    assert produced == ['site_specific', 'final']
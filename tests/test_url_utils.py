@@ -0,0 +1,18 @@
+from url_utils import canonical_host, canonicalize_url
+
+def test_canonicalize_url_normalizes_equivalent_forms():
+    variants = [
+        'https://Example.com/Team/',
+        'https://example.com:443/Team?utm_source=x#members',
+        'https://EXAMPLE.com/Team?fbclid=abc',
+    ]
+    assert {canonicalize_url(url) for url in variants} == {'https://example.com/Team'}
+
+def test_canonicalize_url_sorts_query_and_keeps_meaningful_params():
+    assert canonicalize_url('http://a.test/p?b=2&a=1&gclid=x') == 'http://a.test/p?a=1&b=2'
+    assert canonicalize_url('http://a.test') == 'http://a.test/'
+
+def test_host_aliases_and_ports():
+    assert canonicalize_url('https://twitter.com/jane') == canonicalize_url('https://x.com/jane')
+    assert canonical_host('http://a.test:8080/x') == 'a.test:8080'
+    assert canonical_host('http://a.test:80/x') == 'a.test'
@@ -0,0 +1,60 @@
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# Hosts that serve the same pages under another name
+HOST_ALIASES = {
+    'twitter.com': 'x.com',
+    'www.twitter.com': 'x.com',
+    'mobile.twitter.com': 'x.com',
+    'www.x.com': 'x.com',
+    'www.linkedin.com': 'linkedin.com',
+    'www.github.com': 'github.com',
+}
+
+# Query parameters that only carry campaign/click tracking
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'yclid', 'igshid',
+    'mc_cid', 'mc_eid', '_ga', '_gl', '_hsenc', '_hsmi', 'mkt_tok',
+    'trk', 'trkinfo', 'ref_src', 'ref_url',
+}
+
+def is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    return name.startswith('utm_') or name in TRACKING_PARAMS
+
+def canonical_host(url: str) -> str:
+    """Lowercased host with default port dropped and known aliases resolved"""
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or '').lower().rstrip('.')
+    host = HOST_ALIASES.get(host, host)
+    if ':' in host:
+        # IPv6 literal
+        host = f"[{host}]"
+
+    try:
+        port: Optional[int] = parts.port
+    except ValueError:
+        port = None
+    if port and port != DEFAULT_PORTS.get(parts.scheme.lower()):
+        host = f"{host}:{port}"
+    return host
+
+def canonicalize_url(url: str) -> str:
+    """Canonical form of a URL for cache keys, request coalescing and per-host limits"""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = canonical_host(url)
+
+    # Trailing slashes don't change the page; an empty path is the root
+    path = parts.path.rstrip('/') or '/'
+
+    # Drop tracking parameters and sort the rest; fragments never reach the server
+    query_pairs = [
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not is_tracking_param(name)
+    ]
+    query = urlencode(sorted(query_pairs))
+
+    return urlunsplit((scheme, host, path, query, ''))
@@ -0,0 +1,99 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+class CPUBudgetExceeded(Exception):
+    """Raised instead of starting pool work once a request has used up its CPU budget"""
+    pass
+
+class CPUBudget:
+    """CPU seconds one request may spend in the extraction pool (0 means unlimited)"""
+
+    def __init__(self, seconds: float = 0):
+        self.seconds = seconds
+        self.used = 0.0
+
+    @property
+    def exhausted(self) -> bool:
+        return self.seconds > 0 and self.used >= self.seconds
+
+    def charge(self, cpu_seconds: float):
+        self.used += cpu_seconds
+
+def _measured_call(fn: Callable, args: Tuple) -> Tuple[Any, float, float]:
+    """Run fn in the worker, returning its result, the CPU time it used and when it started"""
+    started_at = time.time()
+    cpu_start = time.thread_time()
+    result = fn(*args)
+    return result, time.thread_time() - cpu_start, started_at
+
+class ExtractionPool:
+    """Thread or process pool for parsing and CPU-bound extraction, off the event loop"""
+
+    KINDS = ('thread', 'process')
+
+    def __init__(self, kind: str = 'thread', workers: int = 4):
+        if kind not in self.KINDS:
+            print(f"⚠️  Unknown extraction pool '{kind}', using thread")
+            kind = 'thread'
+        self.kind = kind
+        self.workers = workers
+        self._executor = self._create_executor()
+
+        # Submitted but not finished (queued or running)
+        self.pending = 0
+        self.completed = 0
+        self.errors = 0
+        self.budget_exceeded = 0
+        self.wait_seconds_total = 0.0
+        self.cpu_seconds_total = 0.0
+
+    def _create_executor(self) -> Executor:
+        if self.kind == 'process':
+            return ProcessPoolExecutor(max_workers=self.workers)
+        return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='extraction')
+
+    async def run(self, fn: Callable, *args, budget: Optional[CPUBudget] = None) -> Any:
+        """Run fn(*args) in the pool, charging its CPU time to the request's budget"""
+        if budget is not None and budget.exhausted:
+            self.budget_exceeded += 1
+            raise CPUBudgetExceeded(f"CPU budget of {budget.seconds}s used up ({budget.used:.2f}s)")
+
+        loop = asyncio.get_running_loop()
+        submitted_at = time.time()
+        self.pending += 1
+        try:
+            result, cpu_seconds, started_at = await loop.run_in_executor(
+                self._executor, _measured_call, fn, args
+            )
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.pending -= 1
+
+        self.completed += 1
+        self.wait_seconds_total += max(started_at - submitted_at, 0.0)
+        self.cpu_seconds_total += cpu_seconds
+        if budget is not None:
+            budget.charge(cpu_seconds)
+        return result
+
+    def shutdown(self):
+        """Stop accepting work; running tasks finish in the background"""
+        self._executor.shutdown(wait=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool statistics, including how many tasks are waiting for a worker"""
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "queue_depth": max(self.pending - self.workers, 0),
+            "running": min(self.pending, self.workers),
+            "completed": self.completed,
+            "errors": self.errors,
+            "budget_exceeded": self.budget_exceeded,
+            "avg_wait_ms": round(self.wait_seconds_total / self.completed * 1000, 2) if self.completed else 0.0,
+            "cpu_seconds_total": round(self.cpu_seconds_total, 3),
+        }